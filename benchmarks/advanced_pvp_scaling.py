@@ -0,0 +1,307 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Scalability benchmark of the advanced_pvp script.
+
+Runs the script against a stand-in cuwo server with a growing number of
+simulated players, which join, kill each other, switch the relation mode
+and leave again. For every player count the set_relation_to calls and
+the time spent in each hook, including the end of its tick, are
+reported, giving a scaling curve that can be compared across versions.
+Has to be run from the repository root:
+
+python benchmarks/advanced_pvp_scaling.py [--players 10 50 100] [--csv f]
+
+"""
+
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+
+
+DEFAULT_PLAYER_COUNTS = [10, 25, 50, 100, 200, 500]
+# Number of simulated kills and foreign relation changes per player
+KILLS_PER_PLAYER = 2
+RELATION_CHANGES_PER_PLAYER = 2
+# Relation modes the benchmark switches between
+MODES = ['neutral', 'hostile']
+
+
+class RelationCounter:
+    """Counts the set_relation_to calls of all stand-in entities."""
+    calls = 0
+
+
+class StandInEntity:
+    """Player entity of the stand-in server."""
+    def __init__(self, entity_id, name, level):
+        """Creates a new StandInEntity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+        name -- Name of the player
+        level -- Level of the player
+
+        """
+        self.entity_id = entity_id
+        self.name = name
+        self.level = level
+        self.pos = types.SimpleNamespace(x=0, y=0, z=0)
+
+    def is_player(self):
+        return True
+
+    def set_relation_to(self, other, relation):
+        RelationCounter.calls += 1
+
+
+class StandInConnection:
+    """Connection of a player to the stand-in server."""
+    def __init__(self, entity):
+        """Creates a new StandInConnection.
+
+        Keyword arguments:
+        entity -- Entity of the player
+
+        """
+        self.entity = entity
+        self.name = entity.name
+
+    def send_chat(self, message):
+        pass
+
+
+class StandInServer:
+    """Stand-in for the parts of the cuwo server the script uses."""
+    def __init__(self):
+        """Creates a new, empty StandInServer."""
+        self.players = {}
+        self.world = types.SimpleNamespace(entities={})
+        self.update_packet = types.SimpleNamespace(kill_actions=[])
+
+    def load_data(self, name, default=None):
+        return default
+
+    def send_chat(self, message):
+        pass
+
+
+class StandInEvent:
+    """Event passed to the hooks, holding arbitrary attributes."""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def install_stand_in_cuwo():
+    """Registers stand-in cuwo modules, so the script can be imported
+    without a cuwo installation.
+
+    """
+    class ServerScript:
+        connection_class = None
+
+        def __init__(self, server):
+            self.server = server
+
+    class ConnectionScript:
+        def __init__(self, parent, connection):
+            self.parent = parent
+            self.connection = connection
+            self.server = parent.server
+
+    class KillAction:
+        pass
+
+    cuwo = types.ModuleType('cuwo')
+    constants = types.ModuleType('cuwo.constants')
+    constants.BLOCK_SCALE = 65536
+    packet = types.ModuleType('cuwo.packet')
+    packet.EntityUpdate = object
+    packet.KillAction = KillAction
+    packet.ServerUpdate = object
+    script = types.ModuleType('cuwo.script')
+    script.ServerScript = ServerScript
+    script.ConnectionScript = ConnectionScript
+    script.command = lambda f: f
+    script.admin = lambda f: f
+    cuwo.constants = constants
+    cuwo.packet = packet
+    cuwo.script = script
+    sys.modules['cuwo'] = cuwo
+    sys.modules['cuwo.constants'] = constants
+    sys.modules['cuwo.packet'] = packet
+    sys.modules['cuwo.script'] = script
+
+
+class Timings:
+    """Relation calls and time spent per benchmark phase."""
+    def __init__(self):
+        """Creates new, empty Timings."""
+        # phase -> [operations, relation calls, seconds]
+        self.phases = {}
+
+    def measure(self, phase, function, *args):
+        """Runs a function and adds its cost to a phase.
+
+        Keyword arguments:
+        phase -- Name of the phase
+        function -- The function to run
+        args -- Arguments passed to the function
+
+        """
+        calls = RelationCounter.calls
+        start = time.perf_counter()
+        function(*args)
+        seconds = time.perf_counter() - start
+        entry = self.phases.setdefault(phase, [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += RelationCounter.calls - calls
+        entry[2] += seconds
+
+
+def tick(script, hook, *args):
+    """Calls a hook and ends the tick, applying the staged relations.
+
+    Keyword arguments:
+    script -- The PVPScript instance
+    hook -- The hook to call
+    args -- Arguments passed to the hook
+
+    """
+    hook(*args)
+    script.update(StandInEvent())
+
+
+def run(advanced_pvp, player_count, rng):
+    """Simulates one server session.
+
+    Keyword arguments:
+    advanced_pvp -- The imported advanced_pvp module
+    player_count -- Number of simulated players
+    rng -- Random number generator to use
+
+    Return value:
+    The Timings of the session
+
+    """
+    timings = Timings()
+    server = StandInServer()
+    script = advanced_pvp.PVPScript(server)
+    timings.measure('load', script.on_load)
+
+    connections = []
+    for i in range(player_count):
+        entity = StandInEntity(i + 1, 'Player%i' % (i + 1),
+            rng.randint(1, 100))
+        connection = StandInConnection(entity)
+        server.players[entity.entity_id] = connection
+        server.world.entities[entity.entity_id] = entity
+        child = advanced_pvp.PVPConnectionScript(script, connection)
+        connections.append(child)
+        timings.measure('join', tick, script, child.on_entity_update,
+            StandInEvent())
+
+    for i in range(KILLS_PER_PLAYER * player_count):
+        killer, target = rng.sample(connections, 2)
+        timings.measure('on_kill', killer.on_kill,
+            StandInEvent(target=target.connection.entity))
+        if i % player_count == 0:
+            timings.measure('update', script.update, StandInEvent())
+
+    for i in range(RELATION_CHANGES_PER_PLAYER * player_count):
+        c1, c2 = rng.sample(connections, 2)
+        event = StandInEvent(entity_from_id=c1.connection.entity.entity_id,
+            entity_to_id=c2.connection.entity.entity_id,
+            relation=advanced_pvp.RELATION_TARGET)
+        timings.measure('on_relation_changed', tick, script,
+            script.on_relation_changed, event)
+
+    for mode in MODES:
+        timings.measure('relation_mode', tick, script, setattr, script,
+            'relation_mode', mode)
+
+    for child in connections:
+        entity = child.connection.entity
+        timings.measure('leave', child.on_unload)
+        del server.players[entity.entity_id]
+        del server.world.entities[entity.entity_id]
+
+    timings.measure('unload', script.on_unload)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures how the ' +
+        'advanced_pvp script scales with the number of players.')
+    parser.add_argument('--players', type=int, nargs='+',
+        default=DEFAULT_PLAYER_COUNTS, help='Player counts to simulate')
+    parser.add_argument('--seed', type=int, default=0,
+        help='Seed of the simulated sessions')
+    parser.add_argument('--csv', help='Also write the results to this ' +
+        'CSV file')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.getcwd())
+    install_stand_in_cuwo()
+    import scripts.advanced_pvp as advanced_pvp
+
+    rows = []
+    cwd = os.getcwd()
+    for player_count in args.players:
+        # the script saves its settings and statistics relative to the
+        # working directory
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                timings = run(advanced_pvp, player_count,
+                    random.Random(args.seed))
+            finally:
+                os.chdir(cwd)
+        for phase, (operations, calls, seconds) in timings.phases.items():
+            rows.append((player_count, phase, operations, calls, seconds))
+
+    print('%7s %-20s %6s %12s %10s %12s' % ('players', 'phase', 'ops',
+        'relations', 'total ms', 'per op us'))
+    for player_count, phase, operations, calls, seconds in rows:
+        print('%7i %-20s %6i %12i %10.3f %12.1f' % (player_count, phase,
+            operations, calls, seconds * 1000.0,
+            seconds * 1000000.0 / operations))
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['players', 'phase', 'operations',
+                'relation_calls', 'seconds'])
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,876 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This script is based on the pvp script delivered with cuwo.
+
+
+"""
+More advanced PVP script than the cuwo's default one.
+"""
+
+
+import time
+
+
+from cuwo.constants import BLOCK_SCALE
+
+
+from cuwo.packet import EntityUpdate
+from cuwo.packet import KillAction
+from cuwo.packet import ServerUpdate
+
+
+from cuwo.script import ConnectionScript
+from cuwo.script import ServerScript
+from cuwo.script import command
+from cuwo.script import admin
+
+
+from ..common.output import ChatBuffer
+from ..common.persistence import SettingsWriter
+from ..common.persistence import load_settings
+from ..common.relations import RelationBatch
+from ..common.relations import RelationMatrix
+
+
+from .factions import FactionTable
+from .kills import KillBuffer
+from .overrides import RelationOverrides
+from .stats import KillStats
+from .stats import StatsDatabase
+from .streaks import MultiKillTracker
+from .streaks import multi_kill_name
+from .zones import BoxZone
+from .zones import CircleZone
+from .zones import ZoneTable
+
+
+SAVE_FILE = 'advanced_pvp'
+SETTINGS_FILE = './save/advanced_pvp.json'
+# Time in seconds changed settings are collected before writing them
+SAVE_DELAY = 2.0
+STATS_FILE = './save/advanced_pvp.db'
+# Time in seconds kill statistics are collected before writing them
+STATS_FLUSH_INTERVAL = 30.0
+# Default and maximum number of players listed by /top
+TOP_DEFAULT = 5
+TOP_MAX = 20
+# Time in seconds within which kills count towards a multi-kill
+MULTI_KILL_WINDOW = 5.0
+# Bonus xp per kill of a multi-kill beyond the first
+MULTI_KILL_BONUS_XP = 5
+# Kill streaks are announced and rewarded every this many kills
+STREAK_INTERVAL = 5
+# Bonus xp per announced kill streak, multiplied by the number of
+# intervals reached
+STREAK_BONUS_XP = 10
+# Edge length of a cell of the zone index in world units
+ZONE_CELL_SIZE = 64 * BLOCK_SCALE
+
+
+KEY_NOTIFY_ON_KILL = 'notify_on_kill'
+KEY_GAIN_XP = 'gain_xp'
+KEY_RELATION_MODE = 'relation_mode'
+KEY_FACTION_MEMBERS = 'faction_members'
+KEY_FACTION_RELATIONS = 'faction_relations'
+KEY_ZONES = 'zones'
+
+
+# Relation constants from cubolt.constants
+RELATION_FRIENDLY_PLAYER = 10
+RELATION_FRIENDLY = 11
+RELATION_FRIENDLY_NAME = 12
+RELATION_HOSTILE_PLAYER = 13
+RELATION_HOSTILE = 14
+RELATION_NEUTRAL = 15
+RELATION_TARGET = 16
+
+
+RELATION_STRING_MAPPING = {
+    RELATION_FRIENDLY_PLAYER : 'friendly_player',
+    RELATION_FRIENDLY : 'friendly',
+    RELATION_HOSTILE_PLAYER : 'hostile_player',
+    RELATION_HOSTILE : 'hostile',
+    RELATION_NEUTRAL : 'neutral'
+}
+
+
+STRING_RELATION_MAPPING = {
+    'friendly_player' : RELATION_FRIENDLY_PLAYER,
+    'friendly' : RELATION_FRIENDLY,
+    'hostile_player' : RELATION_HOSTILE_PLAYER,
+    'hostile' : RELATION_HOSTILE,
+    'neutral' : RELATION_NEUTRAL
+}
+
+
+class PVPConnectionScript(ConnectionScript):
+    def __init__(self, parent, connection):
+        ConnectionScript.__init__(self, parent, connection)
+        self.__joined = False
+
+    def on_entity_update(self, event):
+        entity = self.connection.entity
+        zones = self.parent.zones
+        if not self.__joined:
+            self.parent.factions.add_player(entity, self.connection.name)
+            zones.update_player(entity)
+            self.parent.update_hostilities_of(entity)
+            self.__joined = True
+        elif len(zones) > 0 and zones.update_player(entity):
+            # relations only change when a zone boundary is crossed
+            self.parent.update_hostilities_of(entity)
+            
+    def on_unload(self):
+        entity_id = self.connection.entity.entity_id
+        self.parent.relations.remove(entity_id)
+        self.parent.pending_relations.remove(entity_id)
+        self.parent.factions.remove_player(entity_id)
+        self.parent.multi_kills.remove(entity_id)
+        self.parent.zones.remove_player(entity_id)
+        self.parent.overrides.remove_player(entity_id)
+
+    def on_kill(self, event):
+        # event is not called if an entity with a friendly display is killed
+        ce = self.connection.entity
+        te = event.target
+        if te is not None:
+            # self NPC check is not neccessary, but in view on entity AI
+            # implementation done here
+            if te.is_player() and ce.is_player():
+                name = self.connection.name
+                if self.parent.end_duel(ce, te):
+                    self.parent.chat.send_chat('%s won the duel against %s!'
+                        % (name, te.name))
+                stats = self.parent.stats.record_kill(name, te.name,
+                    time.time())
+                multi_kill = self.parent.multi_kills.record_kill(
+                    ce.entity_id)
+                streak = stats.streak
+                if streak % STREAK_INTERVAL != 0:
+                    streak = 0
+                
+                # kills are announced and rewarded once per tick
+                kills = self.parent.kills
+                if self.parent.gain_xp:
+                    xp = self.calculate_xp(ce.level, te.level)
+                    xp += (multi_kill - 1) * MULTI_KILL_BONUS_XP
+                    xp += streak // STREAK_INTERVAL * STREAK_BONUS_XP
+                    kills.add_xp(ce.entity_id, te.entity_id, xp)
+        
+                if self.parent.notify_on_kill:
+                    kills.add_notification(name, te.name)
+                    if multi_kill > 1:
+                        kills.add_announcement('%s: %s!' % (name,
+                            multi_kill_name(multi_kill)))
+                    if streak:
+                        kills.add_announcement(
+                            '%s is on a %d-kill streak!' % (name, streak))
+        
+    # helper methods
+    def calculate_xp(self, killer_level, killed_level):
+        return max(1, int(10.0 * float(killed_level) / float(killer_level)))
+
+
+class PVPScript(ServerScript):
+    connection_class = PVPConnectionScript
+    
+    # events
+    def on_load(self):
+        self.settings = load_settings(SETTINGS_FILE)
+        if self.settings is None:
+            # settings saved by older versions
+            self.settings = self.server.load_data(SAVE_FILE, {})
+        if KEY_NOTIFY_ON_KILL not in self.settings:
+            self.settings[KEY_NOTIFY_ON_KILL] = False
+        if KEY_GAIN_XP not in self.settings:
+            self.settings[KEY_GAIN_XP] = True
+        if KEY_RELATION_MODE not in self.settings:
+            self.settings[KEY_RELATION_MODE] = 'hostile'
+        if KEY_FACTION_MEMBERS not in self.settings:
+            self.settings[KEY_FACTION_MEMBERS] = {}
+        if KEY_FACTION_RELATIONS not in self.settings:
+            self.settings[KEY_FACTION_RELATIONS] = {}
+        if KEY_ZONES not in self.settings:
+            self.settings[KEY_ZONES] = []
+        relations = {key : STRING_RELATION_MAPPING[mode] for key, mode in
+                     self.settings[KEY_FACTION_RELATIONS].items()}
+        self.factions = FactionTable(self.settings[KEY_FACTION_MEMBERS],
+            relations, RELATION_FRIENDLY_PLAYER)
+        self.zones = ZoneTable(self.settings[KEY_ZONES], ZONE_CELL_SIZE)
+        self.overrides = RelationOverrides(RELATION_HOSTILE,
+            RELATION_FRIENDLY_PLAYER)
+        self.chat = ChatBuffer(self.server)
+        self.kills = KillBuffer()
+        self.relations = RelationMatrix()
+        # relation changes are applied once at the end of each tick
+        self.pending_relations = RelationBatch(self.relations)
+        self.settings_writer = SettingsWriter(SETTINGS_FILE, SAVE_DELAY)
+        self.stats_database = StatsDatabase(STATS_FILE)
+        self.stats = KillStats(self.stats_database)
+        self.stats_flushed = time.monotonic()
+        self.multi_kills = MultiKillTracker(MULTI_KILL_WINDOW,
+            self.stats_flushed)
+    
+    def update(self, event):
+        now = time.monotonic()
+        self.multi_kills.update(now)
+        self.flush_kills()
+        self.chat.flush()
+        self.pending_relations.flush()
+        if now - self.stats_flushed >= STATS_FLUSH_INTERVAL:
+            self.stats.flush()
+            self.stats_flushed = now
+        
+    def on_unload(self):
+        self.flush_kills()
+        self.chat.flush()
+        self.settings_writer.close()
+        self.stats.flush()
+        self.stats_database.close()
+    
+    # cubolt events
+    def on_relation_changed(self, event):
+        from_id = event.entity_from_id
+        to_id = event.entity_to_id
+        if self.relations.get(from_id, to_id) == event.relation:
+            # caused by this script
+            return
+        from_entity = self.server.world.entities[from_id]
+        to_entity = self.server.world.entities[to_id]
+        if from_entity.is_player() and to_entity.is_player():
+            relation = self.get_relation(from_entity, to_entity)
+            self.relations.record(from_id, to_id, event.relation)
+            self.pending_relations.stage(from_entity, to_entity, relation)
+
+    def get_mode(self, event):
+        rm = self.relation_mode
+        if rm != RELATION_FRIENDLY_PLAYER and rm != RELATION_FRIENDLY:
+            return 'pvp'
+        else:
+            return 'default'
+            
+    def get_relation(self, entity1, entity2):
+        """Gets the relation one player should have to another.
+        
+        Duels and parties take precedence over zones, zones over
+        factions and factions over the relation mode. If there are
+        zones, players are friendly unless both are inside of one.
+        
+        Keyword arguments:
+        entity1 -- Entity of the first player
+        entity2 -- Entity of the second player
+        
+        Return value:
+        The relation
+        
+        """
+        id1 = entity1.entity_id
+        id2 = entity2.entity_id
+        if len(self.overrides) > 0:
+            relation = self.overrides.get_relation(id1, id2)
+            if relation is not None:
+                return relation
+        zones = self.zones
+        if len(zones) > 0 and not (zones.is_inside(id1) and
+            zones.is_inside(id2)):
+            return RELATION_FRIENDLY_PLAYER
+        relation = self.factions.get_relation(id1, id2)
+        if relation is None:
+            relation = STRING_RELATION_MAPPING[self.relation_mode]
+        return relation
+            
+    def update_hostilities(self):
+        relations = self.pending_relations
+        get_relation = self.get_relation
+        for p1 in self.server.players.values():
+            for p2 in self.server.players.values():
+                e1 = p1.entity
+                e2 = p2.entity
+                relations.stage(e1, e2, get_relation(e1, e2))
+                
+    def update_hostilities_of(self, entity):
+        """Stages the relations between one player and all others,
+        touching only the pairs involving that player.
+        
+        Keyword arguments:
+        entity -- Entity of the player
+        
+        """
+        relations = self.pending_relations
+        get_relation = self.get_relation
+        for p in self.server.players.values():
+            other = p.entity
+            relations.stage(entity, other, get_relation(entity, other))
+            if other is not entity:
+                relations.stage(other, entity, get_relation(other, entity))
+                
+    def set_faction(self, connection, faction):
+        """Moves a player into a faction and updates the relations of
+        that player.
+        
+        Keyword arguments:
+        connection -- Connection of the player
+        faction -- Name of the faction, None to leave the current one
+        
+        """
+        entity = connection.entity
+        self.factions.set_faction(entity, connection.name, faction)
+        self.settings[KEY_FACTION_MEMBERS] = self.factions.members
+        self.save_settings()
+        self.update_hostilities_of(entity)
+        
+    def set_faction_relation(self, faction1, faction2, relation):
+        """Sets the relation between two factions, only the pairs of
+        online members of both factions are updated.
+        
+        Keyword arguments:
+        faction1 -- Name of the first faction
+        faction2 -- Name of the second faction
+        relation -- The relation, None to use the relation mode
+        
+        """
+        self.factions.set_relation(faction1, faction2, relation)
+        self.settings[KEY_FACTION_RELATIONS] = {
+            key : RELATION_STRING_MAPPING[r] for key, r in
+            self.factions.relations.items()}
+        self.save_settings()
+        relations = self.pending_relations
+        members1 = self.factions.get_online(faction1)
+        members2 = self.factions.get_online(faction2)
+        for e1 in members1:
+            for e2 in members2:
+                relations.stage(e1, e2, self.get_relation(e1, e2))
+                relations.stage(e2, e1, self.get_relation(e2, e1))
+            
+    def add_zone(self, zone):
+        """Adds a PvP zone, replacing the one with the same name.
+        
+        Keyword arguments:
+        zone -- The zone
+        
+        """
+        self.zones.add_zone(zone)
+        self.update_zones()
+        
+    def remove_zone(self, name):
+        """Removes a PvP zone.
+        
+        Keyword arguments:
+        name -- Name of the zone
+        
+        Return value:
+        True, if the zone existed, otherwise False
+        
+        """
+        if not self.zones.remove_zone(name):
+            return False
+        self.update_zones()
+        return True
+            
+    def challenge(self, entity, target):
+        """Challenges a player to a duel.
+        
+        Keyword arguments:
+        entity -- Entity of the challenging player
+        target -- Entity of the challenged player
+        
+        Return value:
+        True, if the duel started, otherwise False
+        
+        """
+        if not self.overrides.challenge(entity.entity_id, target.entity_id):
+            return False
+        self.pending_relations.stage_both(entity, target,
+            self.get_relation(entity, target))
+        return True
+        
+    def end_duel(self, entity1, entity2):
+        """Ends the duel between two players.
+        
+        Keyword arguments:
+        entity1 -- Entity of the first player
+        entity2 -- Entity of the second player
+        
+        Return value:
+        True, if they were dueling, otherwise False
+        
+        """
+        if len(self.overrides) == 0 or not self.overrides.duels.discard(
+            entity1.entity_id, entity2.entity_id):
+            return False
+        self.update_pair(entity1, entity2)
+        return True
+        
+    def invite(self, entity, target):
+        """Invites a player into the own party.
+        
+        Keyword arguments:
+        entity -- Entity of the inviting player
+        target -- Entity of the invited player
+        
+        Return value:
+        True, if the player joined the party of the target, False if
+        the invitation is pending
+        
+        """
+        members = self.overrides.invite(entity.entity_id, target.entity_id)
+        if members is None:
+            return False
+        self.update_hostilities_of(entity)
+        return True
+        
+    def leave_party(self, entity):
+        """Lets a player leave their party.
+        
+        Keyword arguments:
+        entity -- Entity of the player
+        
+        Return value:
+        True, if the player was in a party, otherwise False
+        
+        """
+        members = self.overrides.parties.remove(entity.entity_id)
+        for member_id in members:
+            player = self.server.players.get(member_id)
+            if player is not None:
+                self.update_pair(entity, player.entity)
+        return len(members) > 0
+            
+    # helper methods
+    def update_pair(self, entity1, entity2):
+        """Stages the relations between two players in both directions.
+        
+        Keyword arguments:
+        entity1 -- Entity of the first player
+        entity2 -- Entity of the second player
+        
+        """
+        relations = self.pending_relations
+        relations.stage(entity1, entity2, self.get_relation(entity1,
+            entity2))
+        relations.stage(entity2, entity1, self.get_relation(entity2,
+            entity1))
+    
+    def update_zones(self):
+        """Saves the zones and updates the relations of all players after
+        the zones changed.
+        
+        """
+        self.settings[KEY_ZONES] = self.zones.definitions
+        self.save_settings()
+        for player in self.server.players.values():
+            self.zones.update_player(player.entity)
+        self.update_hostilities()
+    
+    def flush_kills(self):
+        """Sends the kill notifications and xp awards of this tick."""
+        kill_actions = self.server.update_packet.kill_actions
+        for killer_id, target_id, xp in self.kills.pop_xp():
+            kill_action = KillAction()
+            kill_action.entity_id = killer_id
+            kill_action.target_id = target_id
+            kill_action.xp_gained = xp
+            kill_actions.append(kill_action)
+        for message in self.kills.pop_notifications():
+            self.chat.send_chat(message)
+    
+    def save_settings(self):
+        """Marks the settings as changed, they are written to disk by a
+        background thread shortly after.
+        
+        """
+        self.settings_writer.mark_dirty(self.settings)
+    
+    @property
+    def notify_on_kill(self):
+        return self.settings[KEY_NOTIFY_ON_KILL]
+    
+    @notify_on_kill.setter
+    def notify_on_kill(self, enabled):
+        self.settings[KEY_NOTIFY_ON_KILL] = enabled
+        self.save_settings()
+        
+    @notify_on_kill.deleter
+    def notify_on_kill(self):
+        del self.settings[KEY_NOTIFY_ON_KILL]
+    
+    @property
+    def gain_xp(self):
+        return self.settings[KEY_GAIN_XP]
+    
+    @gain_xp.setter
+    def gain_xp(self, gain):
+        self.settings[KEY_GAIN_XP] = gain
+        self.save_settings()
+    
+    @gain_xp.deleter
+    def gain_xp(self):
+        del self.settings[KEY_GAIN_XP]
+    
+    @property
+    def relation_mode(self):
+        return self.settings[KEY_RELATION_MODE]
+        
+    @relation_mode.setter
+    def relation_mode(self, relation):
+        self.settings[KEY_RELATION_MODE] = relation
+        self.save_settings()
+        self.update_hostilities()
+    
+    @relation_mode.deleter
+    def relation_mode(self):
+        del self.settings[KEY_RELATION_MODE]
+    
+
+def get_class():
+    return PVPScript
+    
+        
+# notify on kill commands
+@command
+def notifyonkill(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.notify_on_kill:
+        return 'Kills are notified.'
+    else:
+        return 'Kills are not notified.'
+        
+
+@command
+@admin
+def enablenotifyonkill(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.notify_on_kill:
+        return 'Kills are already notified.'
+    else:
+        pvp_script.notify_on_kill = True
+        return 'Kills are now notified.'
+        
+
+@command
+@admin
+def disablenotifyonkill(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if not pvp_script.notify_on_kill:
+        return 'Kills are already not notified.'
+    else:
+        pvp_script.notify_on_kill = False
+        return 'Kills are no longer notified.'
+        
+
+@command
+@admin
+def togglenotifyonkill(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.notify_on_kill:
+        return disablenotifyonkill(script)
+    else:
+        return enablenotifyonkill(script)
+
+
+# gain xp commands        
+@command
+def gainxp(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.gain_xp:
+        return 'Players gain xp on player kills.'
+    else:
+        return "Players don't gain xp on player kills."
+        
+
+@command
+@admin
+def enablegainxp(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.gain_xp:
+        return 'Players already gain xp on player kills.'
+    else:
+        pvp_script.gain_xp = True
+        return 'Players will now gain xp on player kills.'
+        
+
+@command
+@admin
+def disablegainxp(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if not pvp_script.gain_xp:
+        return "Players already don't gain xp on player kills."
+    else:
+        pvp_script.gain_xp = False
+        return 'Players will no longer gain xp on player kills.'
+       
+     
+@command
+@admin
+def togglegainxp(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.gain_xp:
+        return disablegainxp(script)
+    else:
+        return enablegainxp(script)
+
+
+# relation mode commands        
+@command
+def relationmode(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    rm = pvp_script.relation_mode
+    return 'The current relation mode is: %s' % rm
+
+
+@command
+@admin
+def setrelationmode(script, relation):
+    pvp_script = script.server.scripts.advanced_pvp
+    if relation in STRING_RELATION_MAPPING.keys():
+        pvp_script.relation_mode = relation
+        return 'Successful set relation mode to %s.' % relation
+    else:
+        return 'Unknown mode: %s' % relation
+
+
+# faction commands
+@command
+def faction(script):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    pvp_script = script.server.scripts.advanced_pvp
+    name = pvp_script.factions.get_faction(player.entity.entity_id)
+    if name is None:
+        return 'You are in no faction.'
+    else:
+        return 'You are in the faction %s.' % name
+        
+        
+@command
+def listfactions(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    names = pvp_script.factions.factions
+    if names:
+        return 'Factions: %s' % ', '.join(names)
+    else:
+        return 'There are no factions.'
+        
+        
+@command
+def joinfaction(script, name):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    if '|' in name:
+        return 'Faction names must not contain |.'
+    pvp_script = script.server.scripts.advanced_pvp
+    pvp_script.set_faction(player, name)
+    return 'You joined the faction %s.' % name
+    
+    
+@command
+def leavefaction(script):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.factions.get_faction(player.entity.entity_id) is None:
+        return 'You are in no faction.'
+    pvp_script.set_faction(player, None)
+    return 'You left your faction.'
+    
+    
+@command
+@admin
+def setfactionrelation(script, faction1, faction2, relation):
+    if '|' in faction1 or '|' in faction2:
+        return 'Faction names must not contain |.'
+    pvp_script = script.server.scripts.advanced_pvp
+    if relation == 'default':
+        pvp_script.set_faction_relation(faction1, faction2, None)
+        return ('The relation between %s and %s now follows the ' +
+            'relation mode.') % (faction1, faction2)
+    elif relation in STRING_RELATION_MAPPING.keys():
+        pvp_script.set_faction_relation(faction1, faction2,
+            STRING_RELATION_MAPPING[relation])
+        return 'Successful set relation between %s and %s to %s.' % (
+            faction1, faction2, relation)
+    else:
+        return 'Unknown relation: %s' % relation
+
+
+# statistics commands
+@command
+def stats(script, name=None):
+    if name is None:
+        player = script.get_player(None)
+        if player is None:
+            return 'Please specify a player.'
+        name = player.name
+    pvp_script = script.server.scripts.advanced_pvp
+    player_stats = pvp_script.stats.get(name)
+    if player_stats is None:
+        return 'There are no statistics of %s.' % name
+    return '%s: %d kills, %d deaths, best streak %d' % (name,
+        player_stats.kills, player_stats.deaths, player_stats.best_streak)
+        
+        
+@command
+def top(script, count=None):
+    if count is None:
+        count = TOP_DEFAULT
+    else:
+        try:
+            count = min(TOP_MAX, max(1, int(count)))
+        except ValueError:
+            return 'Invalid number: %s' % count
+    pvp_script = script.server.scripts.advanced_pvp
+    entries = pvp_script.stats.leaderboard.top(count)
+    if not entries:
+        return 'Nobody killed a player yet.'
+    return '\n'.join('%d. %s (%d kills)' % (i + 1, name, kills)
+                     for i, (name, kills) in enumerate(entries))
+
+
+# zone commands
+@command
+def listzones(script):
+    pvp_script = script.server.scripts.advanced_pvp
+    names = pvp_script.zones.zones
+    if names:
+        return 'PvP zones: %s' % ', '.join(names)
+    else:
+        return 'There are no PvP zones, PvP applies everywhere.'
+        
+        
+@command
+def zone(script):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    pvp_script = script.server.scripts.advanced_pvp
+    if len(pvp_script.zones) == 0:
+        return 'There are no PvP zones, PvP applies everywhere.'
+    current = pvp_script.zones.get_zone(player.entity.entity_id)
+    if current is None:
+        return 'You are outside of all PvP zones.'
+    else:
+        return 'You are in the PvP zone %s.' % current.name
+        
+        
+@command
+@admin
+def addboxzone(script, name, x1, y1, x2, y2):
+    try:
+        coordinates = [int(float(c) * BLOCK_SCALE) for c in (x1, y1, x2, y2)]
+    except ValueError:
+        return 'Coordinates have to be numbers.'
+    pvp_script = script.server.scripts.advanced_pvp
+    pvp_script.add_zone(BoxZone(name, *coordinates))
+    return 'Added the PvP zone %s.' % name
+    
+    
+@command
+@admin
+def addcirclezone(script, name, radius):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    try:
+        radius = int(float(radius) * BLOCK_SCALE)
+    except ValueError:
+        return 'Invalid radius: %s' % radius
+    pos = player.entity.pos
+    pvp_script = script.server.scripts.advanced_pvp
+    pvp_script.add_zone(CircleZone(name, pos.x, pos.y, radius))
+    return 'Added the PvP zone %s around you.' % name
+    
+    
+@command
+@admin
+def removezone(script, name):
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.remove_zone(name):
+        return 'Removed the PvP zone %s.' % name
+    else:
+        return 'There is no PvP zone %s.' % name
+
+
+# duel and party commands
+@command
+def duel(script, name):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    target = script.get_player(name)
+    if target is player:
+        return "You can't duel yourself."
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.challenge(player.entity, target.entity):
+        pvp_script.chat.send_chat_to(target, '%s accepted your duel!' %
+            player.name)
+        return 'The duel against %s has begun!' % target.name
+    pvp_script.chat.send_chat_to(target, ('%s challenged you to a duel, ' +
+        'use /duel %s to accept.') % (player.name, player.name))
+    return 'You challenged %s to a duel.' % target.name
+    
+    
+@command
+def endduel(script, name):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    target = script.get_player(name)
+    pvp_script = script.server.scripts.advanced_pvp
+    if not pvp_script.end_duel(player.entity, target.entity):
+        return 'You are not dueling %s.' % target.name
+    pvp_script.chat.send_chat_to(target, '%s ended your duel.' %
+        player.name)
+    return 'You ended your duel against %s.' % target.name
+    
+    
+@command
+def invite(script, name):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    target = script.get_player(name)
+    if target is player:
+        return "You can't invite yourself."
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.invite(player.entity, target.entity):
+        pvp_script.chat.send_chat_to(target, '%s joined your party.' %
+            player.name)
+        return 'You joined the party of %s.' % target.name
+    pvp_script.chat.send_chat_to(target, ('%s invited you into a party, ' +
+        'use /invite %s to join.') % (player.name, player.name))
+    return 'You invited %s into your party.' % target.name
+    
+    
+@command
+def leaveparty(script):
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    pvp_script = script.server.scripts.advanced_pvp
+    if pvp_script.leave_party(player.entity):
+        return 'You left your party.'
+    else:
+        return 'You are in no party.'
@@ -0,0 +1,217 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Factions and the relations between them."""
+
+
+class FactionTable:
+    """Keeps track of the faction of each player and a small table of
+    relations between factions.
+
+    """
+    def __init__(self, members, relations, same_faction_relation):
+        """Creates a new FactionTable.
+
+        Keyword arguments:
+        members -- Dict mapping player names to faction names
+        relations -- Dict mapping 'faction1|faction2' keys to relations
+        same_faction_relation -- Relation between members of the same
+                                 faction if none is set explicitly
+
+        """
+        self.same_faction_relation = same_faction_relation
+        self.__faction_of_name = dict(members)
+        self.__relations = {}
+        for key, relation in relations.items():
+            a, b = key.split('|', 1)
+            self.__relations[self.__key(a, b)] = relation
+        self.__faction_of = {}
+        self.__online = {}
+
+    @property
+    def members(self):
+        """Gets the faction memberships for saving.
+
+        Return value:
+        Dict mapping player names to faction names
+
+        """
+        return dict(self.__faction_of_name)
+
+    @property
+    def relations(self):
+        """Gets the faction relations for saving.
+
+        Return value:
+        Dict mapping 'faction1|faction2' keys to relations
+
+        """
+        return {'%s|%s' % key : relation
+                for key, relation in self.__relations.items()}
+
+    @property
+    def factions(self):
+        """Gets the names of all factions with members.
+
+        Return value:
+        A sorted list of faction names
+
+        """
+        return sorted(set(self.__faction_of_name.values()))
+
+    def add_player(self, entity, name):
+        """Registers a player who joined the server.
+
+        Keyword arguments:
+        entity -- Entity of the player
+        name -- Name of the player
+
+        """
+        faction = self.__faction_of_name.get(name)
+        if faction is not None:
+            self.__add_online(entity, faction)
+
+    def remove_player(self, entity_id):
+        """Unregisters a player who left the server.
+
+        Keyword arguments:
+        entity_id -- Id of the entity of the player
+
+        """
+        faction = self.__faction_of.pop(entity_id, None)
+        if faction is not None:
+            online = self.__online[faction]
+            del online[entity_id]
+            if not online:
+                del self.__online[faction]
+
+    def set_faction(self, entity, name, faction):
+        """Moves a player into a faction.
+
+        Keyword arguments:
+        entity -- Entity of the player
+        name -- Name of the player
+        faction -- Name of the faction, None to leave the current one
+
+        """
+        self.remove_player(entity.entity_id)
+        if faction is None:
+            self.__faction_of_name.pop(name, None)
+        else:
+            self.__faction_of_name[name] = faction
+            self.__add_online(entity, faction)
+
+    def get_faction(self, entity_id):
+        """Gets the faction of a player.
+
+        Keyword arguments:
+        entity_id -- Id of the entity of the player
+
+        Return value:
+        The name of the faction or None
+
+        """
+        return self.__faction_of.get(entity_id)
+
+    def get_online(self, faction):
+        """Gets the entities of the online members of a faction.
+
+        Keyword arguments:
+        faction -- Name of the faction
+
+        Return value:
+        A list of entities
+
+        """
+        return list(self.__online.get(faction, {}).values())
+
+    def set_relation(self, faction1, faction2, relation):
+        """Sets the relation between two factions.
+
+        Keyword arguments:
+        faction1 -- Name of the first faction
+        faction2 -- Name of the second faction
+        relation -- The relation, None to use the relation mode
+
+        """
+        key = self.__key(faction1, faction2)
+        if relation is None:
+            self.__relations.pop(key, None)
+        else:
+            self.__relations[key] = relation
+
+    def get_relation(self, entity_id1, entity_id2):
+        """Gets the relation between two players given by their
+        factions.
+
+        Keyword arguments:
+        entity_id1 -- Id of the entity of the first player
+        entity_id2 -- Id of the entity of the second player
+
+        Return value:
+        The relation or None if the factions don't define one
+
+        """
+        faction_of = self.__faction_of
+        faction1 = faction_of.get(entity_id1)
+        if faction1 is None:
+            return None
+        faction2 = faction_of.get(entity_id2)
+        if faction2 is None:
+            return None
+        relation = self.__relations.get(self.__key(faction1, faction2))
+        if relation is None and faction1 == faction2:
+            return self.same_faction_relation
+        return relation
+
+    def __add_online(self, entity, faction):
+        """Adds an online player to a faction.
+
+        Keyword arguments:
+        entity -- Entity of the player
+        faction -- Name of the faction
+
+        """
+        self.__faction_of[entity.entity_id] = faction
+        online = self.__online.get(faction)
+        if online is None:
+            self.__online[faction] = {entity.entity_id : entity}
+        else:
+            online[entity.entity_id] = entity
+
+    def __key(self, faction1, faction2):
+        """Gets the key of a pair of factions.
+
+        Keyword arguments:
+        faction1 -- Name of the first faction
+        faction2 -- Name of the second faction
+
+        Return value:
+        A tuple of both names in a fixed order
+
+        """
+        if faction1 <= faction2:
+            return (faction1, faction2)
+        return (faction2, faction1)
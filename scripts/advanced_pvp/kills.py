@@ -0,0 +1,123 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Per-tick aggregation of player kills."""
+
+
+def join_names(names):
+    """Joins names to a readable enumeration like "A, B and C".
+
+    Keyword arguments:
+    names -- List of names
+
+    Return value:
+    The joined names
+
+    """
+    if len(names) == 1:
+        return names[0]
+    return '%s and %s' % (', '.join(names[:-1]), names[-1])
+
+
+class KillBuffer:
+    """Collects the kills of a tick, so they can be announced and
+    rewarded in a single batch.
+
+    """
+    def __init__(self):
+        """Creates a new, empty KillBuffer."""
+        self.__victims = {}
+        self.__order = []
+        self.__announcements = []
+        self.__xp = {}
+
+    def __len__(self):
+        """Returns the number of buffered kill notifications."""
+        return len(self.__order)
+
+    def add_notification(self, killer, victim):
+        """Buffers a kill notification.
+
+        Keyword arguments:
+        killer -- Name of the killing player
+        victim -- Name of the killed player
+
+        """
+        victims = self.__victims.get(killer)
+        if victims is None:
+            victims = []
+            self.__victims[killer] = victims
+            self.__order.append(killer)
+        victims.append(victim)
+
+    def add_announcement(self, message):
+        """Buffers a message that is sent after the kill notifications.
+
+        Keyword arguments:
+        message -- The message
+
+        """
+        self.__announcements.append(message)
+
+    def add_xp(self, killer_id, target_id, xp):
+        """Buffers an xp award, awards for the same pair are summed up.
+
+        Keyword arguments:
+        killer_id -- Entity ID of the killing player
+        target_id -- Entity ID of the killed player
+        xp -- Amount of xp gained
+
+        """
+        key = (killer_id, target_id)
+        self.__xp[key] = self.__xp.get(key, 0) + xp
+
+    def pop_notifications(self):
+        """Takes all buffered kill notifications.
+
+        Return value:
+        A list of messages, one per killer in the order of their first
+        kill, followed by the announcements
+
+        """
+        messages = ['%s killed %s!' % (killer,
+                    join_names(self.__victims[killer]))
+                    for killer in self.__order]
+        messages.extend(self.__announcements)
+        self.__victims = {}
+        self.__order = []
+        self.__announcements = []
+        return messages
+
+    def pop_xp(self):
+        """Takes all buffered xp awards.
+
+        Return value:
+        A list of (killer_id, target_id, xp) tuples
+
+        """
+        awards = [(killer_id, target_id, xp) for (killer_id, target_id), xp
+                  in self.__xp.items()]
+        self.__xp = {}
+        return awards
@@ -0,0 +1,243 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Per-pair relation overrides for duels and parties."""
+
+
+class PairTable:
+    """Symmetric set of entity pairs, stored sparsely as a dict mapping
+    each entity id to the set of its partners.
+
+    """
+    def __init__(self):
+        """Creates a new, empty PairTable."""
+        self.__partners = {}
+
+    def __len__(self):
+        """Returns the number of entities with at least one partner."""
+        return len(self.__partners)
+
+    def contains(self, id1, id2):
+        """Checks whether two entities are paired.
+
+        Keyword arguments:
+        id1 -- Id of the first entity
+        id2 -- Id of the second entity
+
+        Return value:
+        True, if they are paired, otherwise False
+
+        """
+        partners = self.__partners.get(id1)
+        return partners is not None and id2 in partners
+
+    def get_partners(self, entity_id):
+        """Gets the partners of an entity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        Return value:
+        A set of the ids of the partners
+
+        """
+        return set(self.__partners.get(entity_id, ()))
+
+    def add(self, id1, id2):
+        """Pairs two entities.
+
+        Keyword arguments:
+        id1 -- Id of the first entity
+        id2 -- Id of the second entity
+
+        """
+        self.__partners.setdefault(id1, set()).add(id2)
+        self.__partners.setdefault(id2, set()).add(id1)
+
+    def discard(self, id1, id2):
+        """Unpairs two entities.
+
+        Keyword arguments:
+        id1 -- Id of the first entity
+        id2 -- Id of the second entity
+
+        Return value:
+        True, if they were paired, otherwise False
+
+        """
+        if not self.contains(id1, id2):
+            return False
+        self.__discard_one(id1, id2)
+        self.__discard_one(id2, id1)
+        return True
+
+    def remove(self, entity_id):
+        """Unpairs an entity from all of its partners.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        Return value:
+        A set of the ids of the former partners
+
+        """
+        partners = self.__partners.pop(entity_id, set())
+        for other in partners:
+            self.__discard_one(other, entity_id)
+        return partners
+
+    def __discard_one(self, entity_id, partner):
+        """Removes a partner from the set of an entity, dropping empty
+        sets.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+        partner -- Id of the partner
+
+        """
+        partners = self.__partners[entity_id]
+        partners.discard(partner)
+        if not partners:
+            del self.__partners[entity_id]
+
+
+class RelationOverrides:
+    """Duels and parties overriding the relation between single pairs of
+    players, as well as the pending requests for them.
+
+    """
+    def __init__(self, duel_relation, party_relation):
+        """Creates new, empty RelationOverrides.
+
+        Keyword arguments:
+        duel_relation -- Relation between two dueling players
+        party_relation -- Relation between two members of a party
+
+        """
+        self.duel_relation = duel_relation
+        self.party_relation = party_relation
+        self.duels = PairTable()
+        self.parties = PairTable()
+        # target id -> set of ids of the requesting players
+        self.__challenges = {}
+        self.__invitations = {}
+
+    def __len__(self):
+        """Returns the number of players with an override."""
+        return len(self.duels) + len(self.parties)
+
+    def get_relation(self, id1, id2):
+        """Gets the overridden relation between two players.
+
+        Keyword arguments:
+        id1 -- Entity ID of the first player
+        id2 -- Entity ID of the second player
+
+        Return value:
+        The relation, None if the pair has no override
+
+        """
+        if self.duels.contains(id1, id2):
+            return self.duel_relation
+        if self.parties.contains(id1, id2):
+            return self.party_relation
+        return None
+
+    def challenge(self, from_id, to_id):
+        """Challenges a player to a duel, the duel starts as soon as the
+        challenged player challenges back.
+
+        Keyword arguments:
+        from_id -- Entity ID of the challenging player
+        to_id -- Entity ID of the challenged player
+
+        Return value:
+        True, if the duel started, otherwise False
+
+        """
+        if self.__take_request(self.__challenges, from_id, to_id):
+            self.duels.add(from_id, to_id)
+            return True
+        self.__challenges.setdefault(to_id, set()).add(from_id)
+        return False
+
+    def invite(self, from_id, to_id):
+        """Invites a player into the own party, the invited player joins
+        as soon as they invite back.
+
+        Keyword arguments:
+        from_id -- Entity ID of the inviting player
+        to_id -- Entity ID of the invited player
+
+        Return value:
+        A set of the ids of all players the joining player got paired
+        with, None if the invitation is pending
+
+        """
+        if not self.__take_request(self.__invitations, from_id, to_id):
+            self.__invitations.setdefault(to_id, set()).add(from_id)
+            return None
+        # accepting an invitation joins the party of the inviting player
+        self.parties.remove(from_id)
+        members = self.parties.get_partners(to_id)
+        members.add(to_id)
+        for member in members:
+            self.parties.add(from_id, member)
+        return members
+
+    def remove_player(self, entity_id):
+        """Ends all duels, parties and requests of a player.
+
+        Keyword arguments:
+        entity_id -- Entity ID of the player
+
+        """
+        self.duels.remove(entity_id)
+        self.parties.remove(entity_id)
+        for requests in (self.__challenges, self.__invitations):
+            requests.pop(entity_id, None)
+            for target_id in [target_id for target_id, senders in
+                              requests.items() if entity_id in senders]:
+                self.__take_request(requests, target_id, entity_id)
+
+    def __take_request(self, requests, target_id, sender_id):
+        """Removes a pending request.
+
+        Keyword arguments:
+        requests -- Dict of the pending requests
+        target_id -- Entity ID of the player the request was sent to
+        sender_id -- Entity ID of the player that sent the request
+
+        Return value:
+        True, if the request was pending, otherwise False
+
+        """
+        senders = requests.get(target_id)
+        if senders is None or sender_id not in senders:
+            return False
+        senders.discard(sender_id)
+        if not senders:
+            del requests[target_id]
+        return True
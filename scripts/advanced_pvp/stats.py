@@ -0,0 +1,286 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""PvP kill statistics and their persistence."""
+
+
+import bisect
+import os
+import os.path
+import queue
+import sqlite3
+import threading
+
+
+class PlayerStats:
+    """Kill statistics of a single player."""
+    __slots__ = ['name', 'kills', 'deaths', 'streak', 'best_streak']
+
+    def __init__(self, name, kills=0, deaths=0, best_streak=0):
+        """Creates new PlayerStats.
+
+        Keyword arguments:
+        name -- Name of the player
+        kills -- Number of players killed
+        deaths -- Number of deaths by other players
+        best_streak -- Most kills without dying in between
+
+        """
+        self.name = name
+        self.kills = kills
+        self.deaths = deaths
+        self.streak = 0
+        self.best_streak = best_streak
+
+    @property
+    def rank_key(self):
+        """Gets the key the player is ordered by on the leaderboard."""
+        return (-self.kills, self.name)
+
+
+class Leaderboard:
+    """Players ordered by their kills, so the top k are found in O(k)."""
+    def __init__(self):
+        """Creates a new, empty Leaderboard."""
+        self.__keys = []
+
+    def add(self, stats):
+        """Adds a player.
+
+        Keyword arguments:
+        stats -- PlayerStats of the player
+
+        """
+        bisect.insort(self.__keys, stats.rank_key)
+
+    def remove(self, stats):
+        """Removes a player, has to be called before their kills change.
+
+        Keyword arguments:
+        stats -- PlayerStats of the player
+
+        """
+        keys = self.__keys
+        i = bisect.bisect_left(keys, stats.rank_key)
+        del keys[i]
+
+    def top(self, count):
+        """Gets the best players.
+
+        Keyword arguments:
+        count -- Number of players to get
+
+        Return value:
+        A list of (name, kills) tuples
+
+        """
+        return [(name, -kills) for kills, name in self.__keys[:count]]
+
+
+class StatsDatabase:
+    """SQLite database holding the statistics and the kill history.
+
+    Writes are queued and executed in batches by a background thread.
+
+    """
+    def __init__(self, path):
+        """Opens the database, creating it if necessary.
+
+        Keyword arguments:
+        path -- Path of the database file
+
+        """
+        self.__path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        connection = self.__connect()
+        try:
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS player_stats (
+                    name TEXT PRIMARY KEY,
+                    kills INTEGER NOT NULL,
+                    deaths INTEGER NOT NULL,
+                    best_streak INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS player_stats_kills
+                    ON player_stats (kills DESC);
+                CREATE TABLE IF NOT EXISTS kills (
+                    time REAL NOT NULL,
+                    killer TEXT NOT NULL,
+                    victim TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS kills_killer
+                    ON kills (killer, time);
+                CREATE INDEX IF NOT EXISTS kills_victim
+                    ON kills (victim, time);
+            ''')
+            connection.commit()
+        finally:
+            connection.close()
+        self.__queue = queue.Queue()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def load(self):
+        """Loads the statistics of all players.
+
+        Return value:
+        A list of PlayerStats
+
+        """
+        connection = self.__connect()
+        try:
+            rows = connection.execute('SELECT name, kills, deaths, ' +
+                'best_streak FROM player_stats').fetchall()
+        finally:
+            connection.close()
+        return [PlayerStats(*row) for row in rows]
+
+    def write(self, stats, kills):
+        """Queues a batch of changes.
+
+        Keyword arguments:
+        stats -- List of (name, kills, deaths, best_streak) tuples
+        kills -- List of (time, killer, victim) tuples
+
+        """
+        self.__queue.put((stats, kills))
+
+    def close(self):
+        """Writes all queued batches and stops the thread."""
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def __connect(self):
+        """Opens a connection to the database."""
+        return sqlite3.connect(self.__path)
+
+    def __run(self):
+        """Main loop of the writer thread."""
+        connection = self.__connect()
+        try:
+            while True:
+                batch = self.__queue.get()
+                if batch is None:
+                    break
+                stats, kills = batch
+                try:
+                    with connection:
+                        connection.executemany('INSERT OR REPLACE INTO ' +
+                            'player_stats VALUES (?, ?, ?, ?)', stats)
+                        connection.executemany('INSERT INTO kills ' +
+                            'VALUES (?, ?, ?)', kills)
+                except sqlite3.Error as e:
+                    print('Could not save PvP statistics: %s' % e)
+        finally:
+            connection.close()
+
+
+class KillStats:
+    """In-memory kill statistics, persisted in batches."""
+    def __init__(self, database):
+        """Creates new KillStats, loading the saved statistics.
+
+        Keyword arguments:
+        database -- The StatsDatabase
+
+        """
+        self.__database = database
+        self.__stats = {}
+        self.__dirty = set()
+        self.__kills = []
+        self.leaderboard = Leaderboard()
+        for stats in database.load():
+            self.__stats[stats.name] = stats
+            self.leaderboard.add(stats)
+
+    def get(self, name):
+        """Gets the statistics of a player.
+
+        Keyword arguments:
+        name -- Name of the player
+
+        Return value:
+        The PlayerStats, or None if the player has none
+
+        """
+        return self.__stats.get(name)
+
+    def record_kill(self, killer, victim, time):
+        """Records a kill.
+
+        Keyword arguments:
+        killer -- Name of the killing player
+        victim -- Name of the killed player
+        time -- Time of the kill (seconds since the epoch)
+
+        Return value:
+        The PlayerStats of the killer
+
+        """
+        k = self.__get_or_create(killer)
+        self.leaderboard.remove(k)
+        k.kills += 1
+        self.leaderboard.add(k)
+        k.streak += 1
+        if k.streak > k.best_streak:
+            k.best_streak = k.streak
+        v = self.__get_or_create(victim)
+        v.deaths += 1
+        v.streak = 0
+        self.__dirty.add(killer)
+        self.__dirty.add(victim)
+        self.__kills.append((time, killer, victim))
+        return k
+
+    def flush(self):
+        """Hands all changes since the last flush to the database."""
+        if not self.__dirty:
+            return
+        stats = []
+        for name in self.__dirty:
+            s = self.__stats[name]
+            stats.append((s.name, s.kills, s.deaths, s.best_streak))
+        self.__database.write(stats, self.__kills)
+        self.__dirty = set()
+        self.__kills = []
+
+    def __get_or_create(self, name):
+        """Gets the statistics of a player, creating them if needed.
+
+        Keyword arguments:
+        name -- Name of the player
+
+        Return value:
+        The PlayerStats
+
+        """
+        stats = self.__stats.get(name)
+        if stats is None:
+            stats = PlayerStats(name)
+            self.__stats[name] = stats
+            self.leaderboard.add(stats)
+        return stats
@@ -0,0 +1,133 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Tracking of multi-kills."""
+
+
+from ..common.timerwheel import TimerWheel
+
+
+# Resolution of the timer wheel in seconds
+RESOLUTION = 0.1
+
+
+MULTI_KILL_NAMES = {
+    2 : 'Double kill',
+    3 : 'Triple kill',
+    4 : 'Quadruple kill'
+}
+
+
+def multi_kill_name(count):
+    """Gets the name of a multi-kill.
+
+    Keyword arguments:
+    count -- Number of kills, at least 2
+
+    Return value:
+    The name
+
+    """
+    return MULTI_KILL_NAMES.get(count, '%d-kill frenzy' % count)
+
+
+class MultiKill:
+    """Kills of a player within the current multi-kill window."""
+    __slots__ = ['count', 'generation']
+
+    def __init__(self):
+        self.count = 0
+        self.generation = 0
+
+
+class MultiKillTracker:
+    """Counts the kills each player makes in quick succession.
+
+    Every kill extends the window of its player. Windows are closed by a
+    timer wheel, so no tick has to look at players without an expiring
+    window.
+
+    """
+    def __init__(self, window, now):
+        """Creates a new MultiKillTracker.
+
+        Keyword arguments:
+        window -- Time in seconds within which the next kill has to
+                  follow to count towards a multi-kill
+        now -- Current (monotonic) time in seconds
+
+        """
+        self.__window = window
+        self.__wheel = TimerWheel(RESOLUTION, now)
+        self.__generation = 0
+        # entity id -> MultiKill, only players with an open window
+        self.__kills = {}
+
+    def __len__(self):
+        """Returns the number of players with an open window."""
+        return len(self.__kills)
+
+    def record_kill(self, entity_id):
+        """Records a kill and extends the window of the killer.
+
+        Keyword arguments:
+        entity_id -- Entity ID of the killing player
+
+        Return value:
+        Number of kills within the current window, including this one
+
+        """
+        kills = self.__kills.get(entity_id)
+        if kills is None:
+            kills = MultiKill()
+            self.__kills[entity_id] = kills
+        kills.count += 1
+        # timers of earlier kills are outdated and ignored on expiry
+        self.__generation += 1
+        kills.generation = self.__generation
+        self.__wheel.schedule(self.__window, (entity_id, kills.generation))
+        return kills.count
+
+    def remove(self, entity_id):
+        """Closes the window of a player.
+
+        Keyword arguments:
+        entity_id -- Entity ID of the player
+
+        """
+        self.__kills.pop(entity_id, None)
+
+    def update(self, now):
+        """Closes all windows that expired.
+
+        Keyword arguments:
+        now -- Current (monotonic) time in seconds
+
+        """
+        all_kills = self.__kills
+        for entity_id, generation in self.__wheel.advance(now):
+            kills = all_kills.get(entity_id)
+            if kills is not None and kills.generation == generation:
+                del all_kills[entity_id]
@@ -0,0 +1,303 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""PvP zones and a uniform grid index over them."""
+
+
+# Zone shapes as stored in the settings
+SHAPE_BOX = 'box'
+SHAPE_CIRCLE = 'circle'
+
+
+# Zones covering more grid cells are not put into the grid, they are
+# tested for every point instead
+MAX_ZONE_CELLS = 1024
+
+
+class BoxZone:
+    """Axis-aligned rectangular zone."""
+    def __init__(self, name, x1, y1, x2, y2):
+        """Creates a new BoxZone.
+
+        Keyword arguments:
+        name -- Name of the zone
+        x1 -- Smallest x coordinate in world units
+        y1 -- Smallest y coordinate in world units
+        x2 -- Largest x coordinate in world units
+        y2 -- Largest y coordinate in world units
+
+        """
+        self.name = name
+        self.x1 = min(x1, x2)
+        self.y1 = min(y1, y2)
+        self.x2 = max(x1, x2)
+        self.y2 = max(y1, y2)
+
+    @property
+    def bounds(self):
+        """Gets the bounding box as (x1, y1, x2, y2) tuple."""
+        return (self.x1, self.y1, self.x2, self.y2)
+
+    def contains(self, x, y):
+        return self.x1 <= x <= self.x2 and self.y1 <= y <= self.y2
+
+    def to_dict(self):
+        return {'name' : self.name, 'shape' : SHAPE_BOX, 'x1' : self.x1,
+                'y1' : self.y1, 'x2' : self.x2, 'y2' : self.y2}
+
+
+class CircleZone:
+    """Circular zone."""
+    def __init__(self, name, x, y, radius):
+        """Creates a new CircleZone.
+
+        Keyword arguments:
+        name -- Name of the zone
+        x -- X coordinate of the center in world units
+        y -- Y coordinate of the center in world units
+        radius -- Radius in world units
+
+        """
+        self.name = name
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.__radius2 = radius * radius
+
+    @property
+    def bounds(self):
+        """Gets the bounding box as (x1, y1, x2, y2) tuple."""
+        r = self.radius
+        return (self.x - r, self.y - r, self.x + r, self.y + r)
+
+    def contains(self, x, y):
+        dx = x - self.x
+        dy = y - self.y
+        return dx * dx + dy * dy <= self.__radius2
+
+    def to_dict(self):
+        return {'name' : self.name, 'shape' : SHAPE_CIRCLE, 'x' : self.x,
+                'y' : self.y, 'radius' : self.radius}
+
+
+def zone_from_dict(definition):
+    """Creates a zone from its saved definition.
+
+    Keyword arguments:
+    definition -- Dict as returned by the to_dict method of a zone
+
+    Return value:
+    The zone
+
+    """
+    shape = definition['shape']
+    if shape == SHAPE_BOX:
+        return BoxZone(definition['name'], definition['x1'],
+            definition['y1'], definition['x2'], definition['y2'])
+    elif shape == SHAPE_CIRCLE:
+        return CircleZone(definition['name'], definition['x'],
+            definition['y'], definition['radius'])
+    raise ValueError('Unknown zone shape: %s' % shape)
+
+
+class ZoneIndex:
+    """Uniform grid mapping each cell to the zones overlapping it, so a
+    point only has to be tested against the zones of its own cell.
+
+    Zones covering more than MAX_ZONE_CELLS cells are kept in a list
+    that is tested for every point, so huge zones cannot blow up the
+    grid.
+
+    """
+    def __init__(self, cell_size):
+        """Creates a new, empty ZoneIndex.
+
+        Keyword arguments:
+        cell_size -- Edge length of a grid cell in world units
+
+        """
+        self.cell_size = cell_size
+        self.__cells = {}
+        self.__large = []
+
+    def build(self, zones):
+        """Rebuilds the index from scratch.
+
+        Keyword arguments:
+        zones -- Iterable of the zones to index
+
+        """
+        size = self.cell_size
+        cells = {}
+        large = []
+        for zone in zones:
+            x1, y1, x2, y2 = zone.bounds
+            cx1 = int(x1 // size)
+            cx2 = int(x2 // size)
+            cy1 = int(y1 // size)
+            cy2 = int(y2 // size)
+            if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > MAX_ZONE_CELLS:
+                large.append(zone)
+                continue
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is None:
+                        cells[(cx, cy)] = [zone]
+                    else:
+                        cell.append(zone)
+        self.__cells = cells
+        self.__large = large
+
+    def find(self, x, y):
+        """Finds a zone containing a point.
+
+        Keyword arguments:
+        x -- X coordinate in world units
+        y -- Y coordinate in world units
+
+        Return value:
+        A zone containing the point, None if there is none
+
+        """
+        size = self.cell_size
+        cell = self.__cells.get((int(x // size), int(y // size)))
+        if cell is not None:
+            for zone in cell:
+                if zone.contains(x, y):
+                    return zone
+        for zone in self.__large:
+            if zone.contains(x, y):
+                return zone
+        return None
+
+
+class ZoneTable:
+    """Keeps the PvP zones and which players are inside of one."""
+    def __init__(self, definitions, cell_size):
+        """Creates a new ZoneTable.
+
+        Keyword arguments:
+        definitions -- List of saved zone definitions
+        cell_size -- Edge length of a cell of the index in world units
+
+        """
+        self.__zones = {}
+        for definition in definitions:
+            zone = zone_from_dict(definition)
+            self.__zones[zone.name] = zone
+        self.__index = ZoneIndex(cell_size)
+        self.__index.build(self.__zones.values())
+        # entity id -> zone the player is in, None for outside
+        self.__players = {}
+
+    def __len__(self):
+        """Returns the number of zones."""
+        return len(self.__zones)
+
+    @property
+    def definitions(self):
+        """Gets the definitions of all zones for saving them."""
+        return [zone.to_dict() for zone in self.__zones.values()]
+
+    @property
+    def zones(self):
+        """Gets the names of all zones."""
+        return sorted(self.__zones.keys())
+
+    def add_zone(self, zone):
+        """Adds a zone, replacing the one with the same name.
+
+        Keyword arguments:
+        zone -- The zone
+
+        """
+        self.__zones[zone.name] = zone
+        self.__index.build(self.__zones.values())
+
+    def remove_zone(self, name):
+        """Removes a zone.
+
+        Keyword arguments:
+        name -- Name of the zone
+
+        Return value:
+        True, if the zone existed, otherwise False
+
+        """
+        if self.__zones.pop(name, None) is None:
+            return False
+        self.__index.build(self.__zones.values())
+        return True
+
+    def get_zone(self, entity_id):
+        """Gets the zone a player was last seen in.
+
+        Keyword arguments:
+        entity_id -- Entity ID of the player
+
+        Return value:
+        The zone, None if the player is outside of all zones
+
+        """
+        return self.__players.get(entity_id)
+
+    def is_inside(self, entity_id):
+        """Checks whether a player was last seen inside of a zone.
+
+        Keyword arguments:
+        entity_id -- Entity ID of the player
+
+        Return value:
+        True, if the player is inside of a zone, otherwise False
+
+        """
+        return self.__players.get(entity_id) is not None
+
+    def update_player(self, entity):
+        """Updates the zone of a player after it moved.
+
+        Keyword arguments:
+        entity -- Entity of the player
+
+        Return value:
+        True, if the player crossed a zone boundary, otherwise False
+
+        """
+        pos = entity.pos
+        zone = self.__index.find(pos.x, pos.y)
+        entity_id = entity.entity_id
+        previous = self.__players.get(entity_id)
+        self.__players[entity_id] = zone
+        return (zone is None) != (previous is None)
+
+    def remove_player(self, entity_id):
+        """Forgets a player.
+
+        Keyword arguments:
+        entity_id -- Entity ID of the player
+
+        """
+        self.__players.pop(entity_id, None)
@@ -26,10 +26,9 @@
 """Capture the flag script for cuwo."""
 
 
-import math
 import os.path
 import shutil
-from datetime import datetime
+import time
 
 
 from cuwo import static
@@ -45,15 +44,23 @@ from cuwo.script import ServerScript
 from cuwo.vector import Vector3
 
 
-from .states import PreGameState
-from .states import GameRunningState
+from ..common.output import ChatBuffer
+from ..common.relations import RelationBatch
+from ..common.relations import RelationMatrix
+
+
+from .arena import Arena
+from .arena import SETTINGS_KEYS
 
 
-from .loot import LootManager
+from .config import ConfigSnapshot
 
 
-from .util import Flag
-from .util import Flagpole
+from .states import PreGameState
+from .states import GameRunningState
+
+
+from .speedcap import SpeedCap
 
 
 # Path to save and config file
@@ -63,12 +70,11 @@ CONFIG_FILE = 'config/capture_the_flag.py'
 
 
 # Keys used in settings dict
-KEY_FLAG_POLE_BLUE_X = 'flag_pole_blue_x'
-KEY_FLAG_POLE_RED_X = 'flag_pole_red_x'
-KEY_FLAG_POLE_BLUE_Y = 'flag_pole_blue_y'
-KEY_FLAG_POLE_RED_Y = 'flag_pole_red_y'
-KEY_FLAG_POLE_BLUE_Z = 'flag_pole_blue_z'
-KEY_FLAG_POLE_RED_Z = 'flag_pole_red_z'
+KEY_ARENAS = 'arenas'
+
+
+# Arena new players are put into, it always exists
+DEFAULT_ARENA = 'default'
 
 
 # Movement speed cap and min update time
@@ -76,6 +82,10 @@ MOVEMENT_SPEED_CAP = 7500000
 MOVEMENT_SPEED_FPS = 1 / 60
 
 
+# Maximum number of relations applied per tick
+RELATION_BUDGET = 400
+
+
 from .constants import RELATION_FRIENDLY_PLAYER
 from .constants import RELATION_FRIENDLY
 from .constants import RELATION_HOSTILE_PLAYER
@@ -108,19 +118,21 @@ class CaptureTheFlagConnectionScript(ConnectionScript):
         """
         if not self.__joined:
             self.__joined = True
-            self.parent.game_state.player_join(self.connection)
+            self.parent.move_player(self.connection,
+                self.parent.arenas[DEFAULT_ARENA])
             self.__last_hp = self.entity.hp
-            self.old_pos = self.entity.pos
-            self.old_time = datetime.now()
         else:
             if self.__last_hp <= 0 and self.entity.hp > 0:
-                self.parent.game_state.on_respawn(self.entity)
+                arena = self.parent.get_arena(self.connection)
+                arena.game_state.on_respawn(self.entity)
             self.__last_hp = self.entity.hp
     
     def on_unload(self):
         """Handles cuwo's on_unload event."""
-        self.parent.game_state.on_leave()
-        self.parent.game_state.player_leave(self.connection)
+        self.parent.remove_player(self.connection)
+        self.parent.relations.remove(self.entity.entity_id)
+        self.parent.relation_batch.remove(self.entity.entity_id)
+        self.parent.speed_cap.reset(self.connection)
         
     def on_hit(self, event):
         """Handles cuwo's on_hit event.
@@ -129,7 +141,8 @@ class CaptureTheFlagConnectionScript(ConnectionScript):
         event -- Further information about what happened
         
         """
-        self.parent.game_state.on_hit(self.connection, event.target)
+        arena = self.parent.get_arena(self.connection)
+        return arena.game_state.on_hit(self.connection, event.target)
         
     def on_kill(self, event):
         """Handles cuwo's on_kill event.
@@ -139,10 +152,10 @@ class CaptureTheFlagConnectionScript(ConnectionScript):
         
         """
         target_id = event.target.entity_id
-        xp_on_kill = self.server.config.capture_the_flag.xp_on_kill
-        if xp_on_kill and target_id in self.server.players:
+        if self.parent.config.xp_on_kill and target_id in self.server.players:
             entity = self.connection.entity
-            self.parent.game_state.on_kill(entity, event.target)
+            arena = self.parent.get_arena(self.connection)
+            arena.game_state.on_kill(entity, event.target)
             
     def on_pos_update(self, event):
         """Handles a position update of this player.
@@ -151,25 +164,10 @@ class CaptureTheFlagConnectionScript(ConnectionScript):
         event -- Further information about what happened
         
         """
-        if self.server.config.capture_the_flag.speed_cap:
-            t = datetime.now()
-            pos = self.entity.pos
-            x = self.old_pos.x - pos.x
-            y = self.old_pos.y - pos.y
-            z = self.old_pos.z - pos.z
-            dif = math.sqrt(x*x + y*y + z*z)
-            elapsed = (t - self.old_time).total_seconds()
-            if elapsed > MOVEMENT_SPEED_FPS:
-                average_speed = dif / elapsed
-                if average_speed > MOVEMENT_SPEED_CAP:
-                    self.parent.game_state.too_fast(self.connection)
-                self.old_pos = pos
-                self.old_time = t
-            
-    def init_game(self):
-        """Initializes this player for a new game."""
-        self.old_time = datetime.now()
-        self.old_pos = self.connection.entity.pos
+        # speeds are checked once per tick by the server script
+        if self.parent.speed_cap_enabled:
+            self.parent.speed_cap.record(self.connection, time.monotonic(),
+                self.entity.pos)
 
 
 class CaptureTheFlagScript(ServerScript):
@@ -179,18 +177,24 @@ class CaptureTheFlagScript(ServerScript):
     def on_load(self):
         """Handles the loading of this script."""
         self.__load_settings()
-        self.loot_manager = LootManager(self.server)
+        self.chat = ChatBuffer(self.server)
+        self.relations = RelationMatrix()
+        # state changes stage their relations, they are applied over
+        # the following ticks
+        self.relation_batch = RelationBatch(self.relations)
+        self.speed_cap = SpeedCap(MOVEMENT_SPEED_CAP, MOVEMENT_SPEED_FPS)
+        self.arenas = {}
+        # entity id -> arena of every joined player
+        self.__player_arenas = {}
         self.load_config()
-        self.__create_flag_poles()
-        self.game_state = PreGameState(self.server, self)
+        for name, settings in self.__settings[KEY_ARENAS].items():
+            self.arenas[name] = Arena(self, name, settings)
         
     def on_unload(self):
         """Handles the unloading of this script."""
-        try:
-            self.flag_pole_red.dispose()
-            self.flag_pole_blue.dispose()
-        except AttributeError:
-            pass
+        self.chat.flush()
+        for arena in self.arenas.values():
+            arena.dispose()
         
     def __load_settings(self):
         """Loads the settings from disk and sets default values if
@@ -198,18 +202,13 @@ class CaptureTheFlagScript(ServerScript):
         
         """
         self.__settings = self.server.load_data(SAVE_FILE, {})
-        if KEY_FLAG_POLE_RED_X not in self.__settings:
-            self.__settings[KEY_FLAG_POLE_RED_X] = 0.0
-        if KEY_FLAG_POLE_RED_Y not in self.__settings:
-            self.__settings[KEY_FLAG_POLE_RED_Y] = 0.0
-        if KEY_FLAG_POLE_RED_Z not in self.__settings:
-            self.__settings[KEY_FLAG_POLE_RED_Z] = 0.0
-        if KEY_FLAG_POLE_BLUE_X not in self.__settings:
-            self.__settings[KEY_FLAG_POLE_BLUE_X] = 0.0
-        if KEY_FLAG_POLE_BLUE_Y not in self.__settings:
-            self.__settings[KEY_FLAG_POLE_BLUE_Y] = 0.0
-        if KEY_FLAG_POLE_BLUE_Z not in self.__settings:
-            self.__settings[KEY_FLAG_POLE_BLUE_Z] = 0.0
+        if KEY_ARENAS not in self.__settings:
+            # settings of older versions only had a single arena
+            default = {}
+            for key in SETTINGS_KEYS:
+                if key in self.__settings:
+                    default[key] = self.__settings.pop(key)
+            self.__settings[KEY_ARENAS] = {DEFAULT_ARENA : default}
                 
     def load_config(self):
         """Loads the config from disk and creates a default file if
@@ -222,42 +221,48 @@ class CaptureTheFlagScript(ServerScript):
             shutil.copyfile(DEFAULT_CONFIG_FILE, CONFIG_FILE)
             self.server.config.capture_the_flag
 
-        r = self.server.config.capture_the_flag.relation_between_matches
-        for p1 in self.server.players.values():
-            for p2 in self.server.players.values():
-                p1.entity.set_relation_to(p2.entity, r)
+        # hot paths only read the snapshot, it is replaced on reload
+        self.config = ConfigSnapshot(self.server.config.capture_the_flag)
+        self.speed_cap_enabled = self.config.speed_cap
+        for arena in self.arenas.values():
+            arena.set_config(self.config)
+        self.apply_config()
            
     def apply_config(self):
         """Applies the current config. Called after reloading
         config.
         
         """
-        config = self.server.config
-        relation = config.capture_the_flag.relation_between_matches
-        for p1 in self.server.players:
-            for p2 in self.server.players:
-                p1.entity.set_relation_to(p2.entity, relation)
+        # players of different arenas keep the relation between matches
+        batch = self.relation_batch
+        relation = self.config.relation_between_matches
+        arenas = list(self.arenas.values())
+        for i, arena1 in enumerate(arenas):
+            for arena2 in arenas[i + 1:]:
+                for p1 in arena1.players.values():
+                    for p2 in arena2.players.values():
+                        batch.stage_both(p1.entity, p2.entity, relation)
+        for arena in arenas:
+            arena.game_state.apply_relations()
             
-    def __save_settings(self):
+    def save_settings(self):
         """Saves the settings to disk."""
         # make sure save directory exists
         if not os.path.exists('./save'):
             os.makedirs('./save')
         self.server.save_data(SAVE_FILE, self.__settings)
-        
-    def __create_flag_poles(self):
-        """Initializes the flag poles."""
-        s = self.server
-        c = (1.0, 0.0, 0.0, 1.0)
-        self.flag_red = Flag(s, self.flag_pole_pos_red, c, 'red')
-        self.flag_pole_red = Flagpole(s, self.flag_pole_pos_red, c)
-        c = (0.0, 0.0, 1.0, 1.0)
-        self.flag_blue = Flag(s, self.flag_pole_pos_blue, c, 'blue')
-        self.flag_pole_blue = Flagpole(s, self.flag_pole_pos_blue, c)
     
     def update(self, event):
         """Updates the script."""
-        self.game_state.update()
+        if self.speed_cap_enabled:
+            for player in self.speed_cap.check():
+                self.get_arena(player).game_state.too_fast(player)
+        # empty arenas have nothing to do
+        for arena in self.arenas.values():
+            if arena.players:
+                arena.update()
+        self.relation_batch.flush(RELATION_BUDGET)
+        self.chat.flush()
         
     def get_mode(self, event):
         """Returns the mode the server is running in.
@@ -267,60 +272,88 @@ class CaptureTheFlagScript(ServerScript):
         
         """
         return 'CTF'
-    
-    @property
-    def flag_pole_pos_red(self):
-        """Returns the red flag poles position.
+        
+    def get_arena(self, player):
+        """Gets the arena of a player.
+        
+        Keyword arguments:
+        player -- The player, None for the console
         
         Return value:
-        The position of the red flag pole as a Vector3
+        The arena, the default arena for the console
         
         """
-        x = self.__settings[KEY_FLAG_POLE_RED_X]
-        y = self.__settings[KEY_FLAG_POLE_RED_Y]
-        z = self.__settings[KEY_FLAG_POLE_RED_Z]
-        return Vector3(x, y, z)
-    
-    @flag_pole_pos_red.setter
-    def flag_pole_pos_red(self, value):
-        """Sets the position of the red flag pole.
+        if player is None:
+            return self.arenas[DEFAULT_ARENA]
+        return self.__player_arenas.get(player.entity.entity_id,
+            self.arenas[DEFAULT_ARENA])
+        
+    def move_player(self, player, arena):
+        """Moves a player into an arena.
+        
+        Keyword arguments:
+        player -- The player
+        arena -- The arena to move the player to
+        
+        """
+        entity = player.entity
+        old_arena = self.__player_arenas.get(entity.entity_id)
+        if old_arena is not None:
+            old_arena.remove_player(player)
+        # players of different arenas keep the relation between matches,
+        # the arena overrides the pairs within it
+        batch = self.relation_batch
+        relation = self.config.relation_between_matches
+        for p in self.server.players.values():
+            if p is player:
+                continue
+            batch.stage(entity, p.entity, relation)
+            batch.stage(p.entity, entity, relation)
+        self.__player_arenas[entity.entity_id] = arena
+        arena.add_player(player)
+        
+    def remove_player(self, player):
+        """Removes a player from their arena.
         
         Keyword arguments:
-        value -- Value to set the position to
+        player -- The player
         
         """
-        self.__settings[KEY_FLAG_POLE_RED_X] = value.x
-        self.__settings[KEY_FLAG_POLE_RED_Y] = value.y
-        self.__settings[KEY_FLAG_POLE_RED_Z] = value.z
-        self.flag_pole_red.pos = value
-        self.__save_settings()
+        arena = self.__player_arenas.pop(player.entity.entity_id, None)
+        if arena is not None:
+            arena.remove_player(player)
+            
+    def add_arena(self, name):
+        """Adds a new arena.
         
-    @property
-    def flag_pole_pos_blue(self):
-        """Returns the blue flag poles position.
+        Keyword arguments:
+        name -- Name of the arena
         
         Return value:
-        The position of the blue flag pole as a Vector3
+        The new arena
         
         """
-        x = self.__settings[KEY_FLAG_POLE_BLUE_X]
-        y = self.__settings[KEY_FLAG_POLE_BLUE_Y]
-        z = self.__settings[KEY_FLAG_POLE_BLUE_Z]
-        return Vector3(x, y, z)
-    
-    @flag_pole_pos_blue.setter
-    def flag_pole_pos_blue(self, value):
-        """Sets the position of the blue flag pole.
+        settings = {}
+        self.__settings[KEY_ARENAS][name] = settings
+        arena = Arena(self, name, settings)
+        self.arenas[name] = arena
+        self.save_settings()
+        return arena
+        
+    def remove_arena(self, name):
+        """Removes an arena, its players are moved to the default arena.
         
         Keyword arguments:
-        value -- Value to set the position to
+        name -- Name of the arena
         
         """
-        self.__settings[KEY_FLAG_POLE_BLUE_X] = value.x
-        self.__settings[KEY_FLAG_POLE_BLUE_Y] = value.y
-        self.__settings[KEY_FLAG_POLE_BLUE_Z] = value.z
-        self.flag_pole_blue.pos = value
-        self.__save_settings()
+        arena = self.arenas.pop(name)
+        del self.__settings[KEY_ARENAS][name]
+        default = self.arenas[DEFAULT_ARENA]
+        for player in list(arena.players.values()):
+            self.move_player(player, default)
+        arena.dispose()
+        self.save_settings()
     
         
 def get_class():
@@ -335,11 +368,12 @@ def setflagpoler(script):
     player = script.get_player(None)
     if player is not None:
         ctfscript = script.server.scripts.capture_the_flag
-        if isinstance(ctfscript.game_state, PreGameState):
+        arena = ctfscript.get_arena(player)
+        if isinstance(arena.game_state, PreGameState):
             p = player.position
             pos = Vector3(p.x, p.y, p.z - 50000)
-            ctfscript.flag_pole_pos_red = pos
-            ctfscript.flag_red.pos = pos
+            arena.flag_pole_pos_red = pos
+            arena.flag_red.pos = pos
             return 'Successful set red flag pole position.'
         else:
             return ('Flag poles can only be set when no match is ' +
@@ -356,12 +390,12 @@ def setflagpoleb(script):
     player = script.get_player(None)
     if player is not None:
         ctfscript = script.server.scripts.capture_the_flag
-        if isinstance(ctfscript.game_state, PreGameState):
-            ctfscript = script.server.scripts.capture_the_flag
+        arena = ctfscript.get_arena(player)
+        if isinstance(arena.game_state, PreGameState):
             p = player.position
             pos = Vector3(p.x, p.y, p.z - 50000)
-            ctfscript.flag_pole_pos_blue = pos
-            ctfscript.flag_blue.pos = pos
+            arena.flag_pole_pos_blue = pos
+            arena.flag_blue.pos = pos
             return 'Successful set blue flag pole position.'
         else:
             return ('Flag poles can only be set when no match is ' +
@@ -375,7 +409,8 @@ def setflagpoleb(script):
 def reloadconfig(script):
     """Command for reloading the config file."""
     ctfscript = script.server.scripts.capture_the_flag
-    if isinstance(ctfscript.game_state, PreGameState):
+    if all(isinstance(arena.game_state, PreGameState) for arena in
+           ctfscript.arenas.values()):
         script.server.config.reload()
         ctfscript.load_config()
         return 'Config reloaded successful.'
@@ -388,8 +423,9 @@ def reloadconfig(script):
 def abortgame(script):
     """Command for aborting a running game."""
     ctfscript = script.server.scripts.capture_the_flag
-    ctfscript.game_state = PreGameState(script.server, ctfscript)
-    script.server.send_chat('Game aborted by administrator.')
+    arena = ctfscript.get_arena(script.get_player(None))
+    arena.game_state = PreGameState(script.server, arena)
+    arena.send_chat('Game aborted by administrator.')
     return 'Game successfully aborted.'
 
     
@@ -413,7 +449,8 @@ def startgame(script, match_mode='autobalance', point_count='1'):
             if p <= 0:
                 return 'You need at least on point to win.'
             else:
-                return ctfscript.game_state.startgame(match_mode, p)
+                arena = ctfscript.get_arena(script.get_player(None))
+                return arena.game_state.startgame(match_mode, p)
                 
 @command
 def join(script, team=None):
@@ -427,11 +464,12 @@ def join(script, team=None):
             return 'Please choose a team: blue or red'
         else:
             ctfscript = script.server.scripts.capture_the_flag
-            return ctfscript.game_state.join(player, team)
+            arena = ctfscript.get_arena(player)
+            return arena.game_state.join(player, team)
 
 
-def tpTo(ctfscript, player, location):
-    if not isinstance(ctfscript.game_state, GameRunningState):
+def tpTo(arena, player, location):
+    if not isinstance(arena.game_state, GameRunningState):
         if player is None:
             return "This command can't be executed from console."
         else:
@@ -444,11 +482,66 @@ def tpTo(ctfscript, player, location):
 def tptoredflag(script):
     ctfscript = script.server.scripts.capture_the_flag
     player = script.get_player(None)
-    return tpTo(ctfscript, player, ctfscript.flag_pole_pos_red)
+    arena = ctfscript.get_arena(player)
+    return tpTo(arena, player, arena.flag_pole_pos_red)
 
 
 @command
 def tptoblueflag(script):
     ctfscript = script.server.scripts.capture_the_flag
     player = script.get_player(None)
-    return tpTo(ctfscript, player, ctfscript.flag_pole_pos_blue)
\ No newline at end of file
+    arena = ctfscript.get_arena(player)
+    return tpTo(arena, player, arena.flag_pole_pos_blue)
+
+
+@command
+def arenas(script):
+    """Command for listing all arenas."""
+    ctfscript = script.server.scripts.capture_the_flag
+    names = ['%s (%i players)' % (name, len(arena.players)) for name, arena
+             in sorted(ctfscript.arenas.items())]
+    return 'Arenas: %s' % ', '.join(names)
+
+
+@command
+def arena(script, name=None):
+    """Command for showing or changing the own arena."""
+    player = script.get_player(None)
+    if player is None:
+        return "This command can't be executed from console."
+    ctfscript = script.server.scripts.capture_the_flag
+    current = ctfscript.get_arena(player)
+    if name is None:
+        return 'You are in the arena %s.' % current.name
+    if name not in ctfscript.arenas:
+        return "There is no arena named '%s'." % name
+    if current.name == name:
+        return 'You are already in the arena %s.' % name
+    ctfscript.move_player(player, ctfscript.arenas[name])
+    return 'You joined the arena %s.' % name
+
+
+@command
+@admin
+def addarena(script, name):
+    """Command for adding an arena."""
+    ctfscript = script.server.scripts.capture_the_flag
+    if name in ctfscript.arenas:
+        return "There already is an arena named '%s'." % name
+    ctfscript.add_arena(name)
+    return ('Added the arena %s, join it to set its flag poles.') % name
+
+
+@command
+@admin
+def removearena(script, name):
+    """Command for removing an arena."""
+    ctfscript = script.server.scripts.capture_the_flag
+    if name == DEFAULT_ARENA:
+        return "The default arena can't be removed."
+    if name not in ctfscript.arenas:
+        return "There is no arena named '%s'." % name
+    if not isinstance(ctfscript.arenas[name].game_state, PreGameState):
+        return 'Arenas can only be removed when no match is running.'
+    ctfscript.remove_arena(name)
+    return 'Removed the arena %s.' % name
@@ -0,0 +1,214 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Arenas, each running its own CTF matches."""
+
+
+from cuwo.vector import Vector3
+
+
+from .loot import LootManager
+
+
+from .states import PreGameState
+
+
+from .util import Flag
+from .util import Flagpole
+
+
+# Keys used in the settings dict of an arena
+KEY_FLAG_POLE_BLUE_X = 'flag_pole_blue_x'
+KEY_FLAG_POLE_RED_X = 'flag_pole_red_x'
+KEY_FLAG_POLE_BLUE_Y = 'flag_pole_blue_y'
+KEY_FLAG_POLE_RED_Y = 'flag_pole_red_y'
+KEY_FLAG_POLE_BLUE_Z = 'flag_pole_blue_z'
+KEY_FLAG_POLE_RED_Z = 'flag_pole_red_z'
+SETTINGS_KEYS = [KEY_FLAG_POLE_BLUE_X, KEY_FLAG_POLE_RED_X,
+                 KEY_FLAG_POLE_BLUE_Y, KEY_FLAG_POLE_RED_Y,
+                 KEY_FLAG_POLE_BLUE_Z, KEY_FLAG_POLE_RED_Z]
+
+
+class Arena:
+    """An arena with its own flag poles, flags, game state and players.
+
+    Game states only see the players of their arena, chat sent through
+    an arena only reaches its players.
+
+    """
+    def __init__(self, ctfscript, name, settings):
+        """Creates a new Arena.
+
+        Keyword arguments:
+        ctfscript -- CaptureTheFlagScript instance
+        name -- Name of the arena
+        settings -- Settings dict of the arena, missing values are
+                    filled with defaults
+
+        """
+        self.ctfscript = ctfscript
+        self.name = name
+        self.server = ctfscript.server
+        self.world = ctfscript.world
+        self.relations = ctfscript.relations
+        self.relation_batch = ctfscript.relation_batch
+        self.speed_cap = ctfscript.speed_cap
+        self.config = ctfscript.config
+        self.loot_manager = LootManager(self.server, self.config)
+        # entity id -> connection of the players in this arena
+        self.players = {}
+        self.__settings = settings
+        for key in SETTINGS_KEYS:
+            if key not in settings:
+                settings[key] = 0.0
+        self.__create_flag_poles()
+        self.game_state = PreGameState(self.server, self)
+
+    def dispose(self):
+        """Removes the flag poles and flags of this arena."""
+        self.flag_pole_red.dispose()
+        self.flag_pole_blue.dispose()
+
+    def update(self):
+        """Updates the game state of this arena."""
+        self.game_state.update()
+
+    def set_config(self, config):
+        """Sets a new config snapshot.
+
+        Keyword arguments:
+        config -- The ConfigSnapshot
+
+        """
+        self.config = config
+        self.loot_manager.config = config
+        self.game_state.config = config
+
+    def add_player(self, player):
+        """Moves a player into this arena.
+
+        Keyword arguments:
+        player -- The player
+
+        """
+        self.players[player.entity.entity_id] = player
+        self.game_state.player_join(player)
+
+    def remove_player(self, player):
+        """Removes a player from this arena.
+
+        Keyword arguments:
+        player -- The player
+
+        """
+        # the states must not count the player any more
+        self.players.pop(player.entity.entity_id, None)
+        self.game_state.on_leave()
+        self.game_state.player_leave(player)
+
+    def send_chat(self, msg):
+        """Sends a chat message to all players of this arena.
+
+        Keyword arguments:
+        msg -- The message
+
+        """
+        chat = self.ctfscript.chat
+        for player in self.players.values():
+            chat.send_chat_to(player, msg)
+
+    def send_chat_to(self, player, msg):
+        """Sends a chat message to a single player.
+
+        Keyword arguments:
+        player -- The player
+        msg -- The message
+
+        """
+        self.ctfscript.chat.send_chat_to(player, msg)
+
+    def __create_flag_poles(self):
+        """Initializes the flag poles."""
+        s = self.server
+        c = (1.0, 0.0, 0.0, 1.0)
+        self.flag_red = Flag(s, self.flag_pole_pos_red, c, 'red')
+        self.flag_pole_red = Flagpole(s, self.flag_pole_pos_red, c)
+        c = (0.0, 0.0, 1.0, 1.0)
+        self.flag_blue = Flag(s, self.flag_pole_pos_blue, c, 'blue')
+        self.flag_pole_blue = Flagpole(s, self.flag_pole_pos_blue, c)
+
+    @property
+    def flag_pole_pos_red(self):
+        """Returns the red flag poles position.
+
+        Return value:
+        The position of the red flag pole as a Vector3
+
+        """
+        x = self.__settings[KEY_FLAG_POLE_RED_X]
+        y = self.__settings[KEY_FLAG_POLE_RED_Y]
+        z = self.__settings[KEY_FLAG_POLE_RED_Z]
+        return Vector3(x, y, z)
+
+    @flag_pole_pos_red.setter
+    def flag_pole_pos_red(self, value):
+        """Sets the position of the red flag pole.
+
+        Keyword arguments:
+        value -- Value to set the position to
+
+        """
+        self.__settings[KEY_FLAG_POLE_RED_X] = value.x
+        self.__settings[KEY_FLAG_POLE_RED_Y] = value.y
+        self.__settings[KEY_FLAG_POLE_RED_Z] = value.z
+        self.flag_pole_red.pos = value
+        self.ctfscript.save_settings()
+
+    @property
+    def flag_pole_pos_blue(self):
+        """Returns the blue flag poles position.
+
+        Return value:
+        The position of the blue flag pole as a Vector3
+
+        """
+        x = self.__settings[KEY_FLAG_POLE_BLUE_X]
+        y = self.__settings[KEY_FLAG_POLE_BLUE_Y]
+        z = self.__settings[KEY_FLAG_POLE_BLUE_Z]
+        return Vector3(x, y, z)
+
+    @flag_pole_pos_blue.setter
+    def flag_pole_pos_blue(self, value):
+        """Sets the position of the blue flag pole.
+
+        Keyword arguments:
+        value -- Value to set the position to
+
+        """
+        self.__settings[KEY_FLAG_POLE_BLUE_X] = value.x
+        self.__settings[KEY_FLAG_POLE_BLUE_Y] = value.y
+        self.__settings[KEY_FLAG_POLE_BLUE_Z] = value.z
+        self.flag_pole_blue.pos = value
+        self.ctfscript.save_settings()
@@ -0,0 +1,79 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Snapshot of the CTF config for fast access."""
+
+
+class ConfigSnapshot:
+    """Immutable copy of the capture_the_flag config section.
+
+    Reading an attribute of the snapshot is a plain slot access instead
+    of a lookup through the dynamic config object. A new snapshot has to
+    be taken whenever the config is reloaded.
+
+    """
+    __slots__ = [
+        'relation_between_matches',
+        'speed_cap',
+        'xp_on_kill',
+        'xp_on_same_level',
+        'xp_on_win',
+        'loot',
+        'item_chance',
+        'spirit_chance',
+        'mana_cube_chance',
+        'weapon_chance',
+        'armor_chance',
+        'gloves_chance',
+        'boots_chance',
+        'shoulder_armor_chance',
+        'amulet_chance',
+        'ring_chance',
+        'common_chance',
+        'uncommon_chance',
+        'rare_chance',
+        'epic_chance',
+        'legendary_chance',
+        'fire_spirit_chance',
+        'unholy_spirit_chance',
+        'ice_spirit_chance',
+        'wind_spirit_chance'
+    ]
+
+    def __init__(self, config):
+        """Creates a new ConfigSnapshot.
+
+        Keyword arguments:
+        config -- The capture_the_flag config section
+
+        """
+        for name in self.__slots__:
+            object.__setattr__(self, name, getattr(config, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('The config snapshot is read-only.')
+
+    def __delattr__(self, name):
+        raise AttributeError('The config snapshot is read-only.')
@@ -116,14 +116,21 @@ ITEM_RARITY_RARE = 2
 
 class LootManager(object):
     """Manager for loot."""
-    def __init__(self, server):
-        """Creates a new LootManager."""
+    def __init__(self, server, config):
+        """Creates a new LootManager.
+        
+        Keyword arguments:
+        server -- Current server instance
+        config -- ConfigSnapshot of the CTF config
+        
+        """
         # Configurable
         # Rarity of items
         # Types of items
         # Reward spirits (True/False)
         # Reward mana cubes (True/False)
         self.__server = server
+        self.config = config
         self.__loot = None
         self.__create_item_types()
         self.__create_material_data()
@@ -165,7 +172,7 @@ class LootManager(object):
         """
         if self.__loot is None:
             self.__loot = self.__calc_loot()
-        if self.__server.config.capture_the_flag.loot:
+        if self.config.loot:
             for player in team:
                 player.give_item(self.__get_loot_item(player))
         self.__loot = None
@@ -214,7 +221,7 @@ class LootManager(object):
         return item
             
     def __get_item_type(self):
-        config = self.__server.config.capture_the_flag
+        config = self.config
         types = [config.weapon_chance, config.armor_chance,
                  config.gloves_chance, config.boots_chance,
                  config.shoulder_armor_chance, config.amulet_chance,
@@ -282,7 +289,7 @@ class LootManager(object):
         One of the LOOT_ constants
         
         """
-        config = self.__server.config.capture_the_flag
+        config = self.config
         types = [config.item_chance, config.spirit_chance,
                  config.mana_cube_chance]
         type = random.randint(0, sum(types))
@@ -296,7 +303,7 @@ class LootManager(object):
             return LOOT_MANA_CUBE
     
     def __get_loot_spirit(self):
-        config = self.__server.config.capture_the_flag
+        config = self.config
         spirits = [config.fire_spirit_chance,
                    config.unholy_spirit_chance,
                    config.ice_spirit_chance,
@@ -315,7 +322,7 @@ class LootManager(object):
             return LOOT_SPIRIT_WIND
 
     def __get_loot_rarity(self):
-        config = self.__server.config.capture_the_flag
+        config = self.config
         chances = [config.common_chance, config.uncommon_chance,
                    config.rare_chance, config.epic_chance,
                    config.legendary_chance]
@@ -0,0 +1,112 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Spatial hash for finding players close to a point."""
+
+
+class SpatialHash:
+    """Uniform grid over the x/y plane mapping each cell to the items
+    inside of it, so a proximity query only has to look at the cells
+    around the queried point.
+
+    """
+    def __init__(self, cell_size):
+        """Creates a new, empty SpatialHash.
+
+        Keyword arguments:
+        cell_size -- Edge length of a grid cell in world units, should
+                     be about the radius of the queries
+
+        """
+        self.cell_size = cell_size
+        self.__cells = {}
+        self.__count = 0
+
+    def __len__(self):
+        """Returns the number of inserted items."""
+        return self.__count
+
+    def clear(self):
+        """Removes all items."""
+        self.__cells = {}
+        self.__count = 0
+
+    def insert(self, item, pos):
+        """Inserts an item.
+
+        Keyword arguments:
+        item -- The item
+        pos -- Position of the item
+
+        """
+        size = self.cell_size
+        key = (int(pos.x // size), int(pos.y // size))
+        entry = (self.__count, item, pos.x, pos.y, pos.z)
+        cell = self.__cells.get(key)
+        if cell is None:
+            self.__cells[key] = [entry]
+        else:
+            cell.append(entry)
+        self.__count += 1
+
+    def find(self, pos, radius):
+        """Finds the item inserted first of those closer to a point than
+        the given radius.
+
+        Keyword arguments:
+        pos -- The point
+        radius -- Maximum distance in world units (exclusive)
+
+        Return value:
+        The item, None if there is none
+
+        """
+        cells = self.__cells
+        if not cells:
+            return None
+        size = self.cell_size
+        x = pos.x
+        y = pos.y
+        z = pos.z
+        max_sq = radius * radius
+        best = None
+        for cx in range(int((x - radius) // size),
+                        int((x + radius) // size) + 1):
+            for cy in range(int((y - radius) // size),
+                            int((y + radius) // size) + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    continue
+                for entry in cell:
+                    if best is not None and entry[0] > best[0]:
+                        continue
+                    dx = entry[2] - x
+                    dy = entry[3] - y
+                    dz = entry[4] - z
+                    if dx * dx + dy * dy + dz * dz < max_sq:
+                        best = entry
+        if best is None:
+            return None
+        return best[1]
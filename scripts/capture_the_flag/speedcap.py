@@ -0,0 +1,114 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Speed cap checking position samples once per tick."""
+
+
+from collections import deque
+
+
+# Number of position samples kept per player
+DEFAULT_SAMPLES = 8
+
+
+class SpeedCap:
+    """Records the positions of players and checks their speeds in a
+    single pass per tick.
+
+    The speed is estimated from the oldest and the newest sample of each
+    player, so a single jittery sample is averaged out.
+
+    """
+    def __init__(self, max_speed, min_interval, samples=DEFAULT_SAMPLES):
+        """Creates a new SpeedCap.
+
+        Keyword arguments:
+        max_speed -- Maximum speed in world units per second
+        min_interval -- Minimum time in seconds the samples have to span
+                        before the speed is checked
+        samples -- Number of samples kept per player
+
+        """
+        self.__max_speed2 = float(max_speed) * max_speed
+        self.__min_interval = min_interval
+        self.__samples = samples
+        # player -> ring buffer of (time, x, y, z) tuples
+        self.__buffers = {}
+
+    def record(self, player, time, pos):
+        """Records a position sample.
+
+        Keyword arguments:
+        player -- The player
+        time -- Time of the sample (monotonic seconds)
+        pos -- Position of the player
+
+        """
+        buffer = self.__buffers.get(player)
+        if buffer is None:
+            buffer = deque(maxlen=self.__samples)
+            self.__buffers[player] = buffer
+        buffer.append((time, pos.x, pos.y, pos.z))
+
+    def reset(self, player):
+        """Forgets the samples of a player, e.g. after a teleport.
+
+        Keyword arguments:
+        player -- The player
+
+        """
+        self.__buffers.pop(player, None)
+
+    def check(self):
+        """Checks the speeds of all players.
+
+        Only the newest sample of a player exceeding the speed cap is
+        kept, so a single violation is reported once.
+
+        Return value:
+        A list of the players that moved too fast
+
+        """
+        max_speed2 = self.__max_speed2
+        min_interval = self.__min_interval
+        too_fast = []
+        for player, buffer in self.__buffers.items():
+            if len(buffer) < 2:
+                continue
+            t0, x0, y0, z0 = buffer[0]
+            t1, x1, y1, z1 = buffer[-1]
+            elapsed = t1 - t0
+            if elapsed <= min_interval:
+                continue
+            dx = x1 - x0
+            dy = y1 - y0
+            dz = z1 - z0
+            # compare squared distances to avoid the square root
+            if dx * dx + dy * dy + dz * dz > max_speed2 * elapsed * elapsed:
+                too_fast.append(player)
+                newest = buffer[-1]
+                buffer.clear()
+                buffer.append(newest)
+        return too_fast
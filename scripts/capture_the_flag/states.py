@@ -45,6 +45,9 @@ from .constants import RELATION_FRIENDLY
 from .constants import RELATION_HOSTILE
 
 
+from .proximity import SpatialHash
+
+
 # Sounds
 SOUND_LEVEL_UP = 29
 SOUND_MISSION_COMPLETE = 30
@@ -58,6 +61,7 @@ DEFAULT_REPLY = ('This command cannot be issued in the current state ' +
     'of the game.')
 FLAG_POLE_DISTANCE = 500000
 FLAG_CAPTURE_DISTANCE = 150000
+FLAG_CAPTURE_DISTANCE_SQUARED = FLAG_CAPTURE_DISTANCE ** 2
 
 
 # EntityUpdatePacket mask for transfer of the position
@@ -66,16 +70,19 @@ MASK_POSITION = 0
 
 class GameState:
     """Parent class of all GameStates."""
-    def __init__(self, server, ctfscript):
+    def __init__(self, server, arena):
         """Initializes the GameState.
         
         Keyword arguments:
         server -- Current server instance
-        ctfscript -- CaptureTheFlagServerScript instance
+        arena -- Arena the state belongs to
         
         """
         self.server = server
-        self.ctfscript = ctfscript
+        self.arena = arena
+        # chat sent through the arena only reaches its players
+        self.chat = arena
+        self.config = arena.config
     
     def update(self):
         """Method for handling update logic."""
@@ -167,21 +174,38 @@ class GameState:
         
         """
             
-    def _distance(self, v1, v2):
-        """Calculates the distance between two vectors.
+    def _distance_squared(self, v1, v2):
+        """Calculates the squared distance between two vectors.
         
         Keyword arguments:
         v1 -- The first vector
         v2 -- The second vector
         
         Return value:
-        The distance as a float
+        The squared distance
         
         """
         x = v1.x - v2.x
         y = v1.y - v2.y
         z = v1.z - v2.z
-        return math.sqrt(x*x + y*y + z*z)
+        return x*x + y*y + z*z
+                    
+    def _pin_spectators(self, spectators):
+        """Moves spectators back to the origin of the world.
+        
+        Only spectators who moved since they were last pinned are
+        updated, so watching players cause no traffic while idle.
+        
+        Keyword arguments:
+        spectators -- The spectators
+        
+        """
+        for p in spectators:
+            entity = p.entity
+            pos = entity.pos
+            if pos.x or pos.y or pos.z:
+                entity.pos = Vector3(0, 0, 0)
+                entity.mask |= MASK_POSITION
                     
     def _send_chat(self, msg, players):
         """Send a chat message to the given players.
@@ -192,12 +216,51 @@ class GameState:
         
         """
         for p in players:
-            p.send_chat(msg)
+            self.chat.send_chat_to(p, msg)
             
-    def _set_relation_all(self, relation):
-        for p1 in self.server.players.values():
-            for p2 in self.server.players.values():
-                p1.entity.set_relation_to(p2.entity, relation)
+    def relation_between(self, player1, player2):
+        """Gets the relation one player should have to another in this
+        state.
+        
+        Keyword arguments:
+        player1 -- The player the relation is from
+        player2 -- The player the relation is to
+        
+        Return value:
+        The relation
+        
+        """
+        return self.config.relation_between_matches
+        
+    def apply_relations(self):
+        """Stages the relations between all players for this state.
+        
+        Only pairs whose relation differs from the applied one cost a
+        call, these are spread over the next ticks.
+        
+        """
+        batch = self.arena.relation_batch
+        relation_between = self.relation_between
+        players = list(self.arena.players.values())
+        for p1 in players:
+            e1 = p1.entity
+            for p2 in players:
+                batch.stage(e1, p2.entity, relation_between(p1, p2))
+                
+    def _apply_relations_of(self, player):
+        """Stages the relations between one player and all others for
+        this state.
+        
+        Keyword arguments:
+        player -- The player
+        
+        """
+        batch = self.arena.relation_batch
+        relation_between = self.relation_between
+        entity = player.entity
+        for p in self.arena.players.values():
+            batch.stage(entity, p.entity, relation_between(player, p))
+            batch.stage(p.entity, entity, relation_between(p, player))
         
     def _calculate_xp(self, killer_level, killed_level):
         """Calculates the amount of XP a player gains for a kill.
@@ -211,32 +274,29 @@ class GameState:
         
         """
         tmp = float(killed_level) / float(killer_level)
-        config = self.server.config
-        return max(1, int(config.capture_the_flag.xp_on_same_level * tmp))
+        return max(1, int(self.config.xp_on_same_level * tmp))
 
         
 class PreGameState(GameState):
     """State before the game starts (lobby)."""
-    def __init__(self, server, ctfscript):
+    def __init__(self, server, arena):
         """Creates a new PreGameState.
         
         server -- Current server instance
-        ctfscript -- CaptureTheFlagServerScript instance
+        arena -- Arena the state belongs to
         
         """
-        GameState.__init__(self, server, ctfscript)
+        GameState.__init__(self, server, arena)
         self.__match_mode = 'autobalance'
-        ctfscript.flag_red.pos = ctfscript.flag_pole_pos_red
-        ctfscript.flag_red.carrier = None
-        ctfscript.flag_blue.pos = ctfscript.flag_pole_pos_blue
-        ctfscript.flag_blue.carrier = None
+        arena.flag_red.pos = arena.flag_pole_pos_red
+        arena.flag_red.carrier = None
+        arena.flag_blue.pos = arena.flag_pole_pos_blue
+        arena.flag_blue.carrier = None
         
-        relation = server.config.capture_the_flag.relation_between_matches
-        self._set_relation_all(relation)
+        self.apply_relations()
 
     def player_join(self, player):
-        relation = self.server.config.capture_the_flag.relation_between_matches
-        self._set_relation_all(relation)
+        self._apply_relations_of(player)
         
     def startgame(self, match_mode='autobalance', point_count=1, use_last=False):
         """Method for handling a /startgame command.
@@ -250,38 +310,57 @@ class PreGameState(GameState):
         Message to send the command executor
         
         """
-        if len(self.server.players) > 1:
+        if len(self.arena.players) > 1:
             if not use_last:
                 self.__match_mode = match_mode
             
             if self.__match_mode == 'choose':
-                self.ctfscript.game_state = GameChooseState(
-                    self.server, self.ctfscript, self,
+                self.arena.game_state = GameChooseState(
+                    self.server, self.arena, self,
                     point_count)
             else:
-                self.ctfscript.game_state = GameAutobalancingState(
-                    self.server, self.ctfscript, self, point_count)
-                
-            self._set_relation_all(RELATION_FRIENDLY_PLAYER)
+                self.arena.game_state = GameAutobalancingState(
+                    self.server, self.arena, self, point_count)
+            # nobody can be hurt until the match is running
+            self.arena.game_state.apply_relations()
             
             return 'Game starting...'
         else:
             return 'Not enough players to start a match!'
                
                
-class GameAutobalancingState(GameState):
+class GameStartingState(GameState):
+    """Parent class of the states forming the teams, all players are
+    friendly to each other.
+    
+    """
+    def relation_between(self, player1, player2):
+        """Gets the relation one player should have to another.
+        
+        Keyword arguments:
+        player1 -- The player the relation is from
+        player2 -- The player the relation is to
+        
+        Return value:
+        The relation
+        
+        """
+        return RELATION_FRIENDLY_PLAYER
+               
+               
+class GameAutobalancingState(GameStartingState):
     """State for autobalancing the teams."""
-    def __init__(self, server, ctfscript, pre_game_state, point_count):
+    def __init__(self, server, arena, pre_game_state, point_count):
         """Creates a new GameAutobalancingState
         
         Keyword arguments:
         server -- Current server instance
-        ctfscript -- CaptureTheFlagServerScript instance
+        arena -- Arena the state belongs to
         pre_game_state -- Last active game state
         point_count -- Number of flags needed to win
         
         """
-        GameState.__init__(self, server, ctfscript)
+        GameState.__init__(self, server, arena)
         self.__pre_game_state = pre_game_state
         self.__point_count = point_count
         
@@ -294,9 +373,9 @@ class GameAutobalancingState(GameState):
         self.__autobalance(red, blue)
 
         server = self.server
-        ctf = self.ctfscript
+        ctf = self.arena
         ctf.game_state = GameInitialisingState(server,
-            self.ctfscript, self.__pre_game_state, red, blue,
+            self.arena, self.__pre_game_state, red, blue,
             [], point_count)
             
     def __autobalance(self, red, blue):
@@ -307,7 +386,7 @@ class GameAutobalancingState(GameState):
         blue -- List for the blue players
         
         """
-        players = self.server.players.values()
+        players = self.arena.players.values()
         players = sorted(players, key=lambda player: \
             -1*player.entity.level)
         r = 0
@@ -322,37 +401,37 @@ class GameAutobalancingState(GameState):
                 blue.append(p)
                 
                 
-class GameChooseState(GameState):
+class GameChooseState(GameStartingState):
     """State for choosing teams."""
-    def __init__(self, server, ctfscript, pre_game_state, point_count):
+    def __init__(self, server, arena, pre_game_state, point_count):
         """Creates a new GameAutobalancingState
         
         Keyword arguments:
         server -- Current server instance
-        ctfscript -- CaptureTheFlagServerScript instance
+        arena -- Arena the state belongs to
         pre_game_state -- Last active game state
         point_count -- Number of flags needed to win
         
         """
-        GameState.__init__(self, server, ctfscript)
+        GameState.__init__(self, server, arena)
         self.__pre_game_state = pre_game_state
         self.__point_count = point_count
         self.__to_choose = []
         self.__red = []
         self.__blue = []
         self.__spectators = []
-        for player in server.players.values():
+        for player in arena.players.values():
             self.__to_choose.append(player)
-        self.server.send_chat("Choose your team using '/join <team>'")
+        self.chat.send_chat("Choose your team using '/join <team>'")
             
     def update(self):
         """Method for handling update logic."""
         if len(self.__to_choose) == 0:
             if self.__check_teams():
                 server = self.server
-                ctf = self.ctfscript
+                ctf = self.arena
                 ctf.game_state = GameInitialisingState(server,
-                    self.ctfscript, self.__pre_game_state, self.__red,
+                    self.arena, self.__pre_game_state, self.__red,
                     self.__blue, self.__spectators,
                     self.__point_count)
                 
@@ -374,15 +453,15 @@ class GameChooseState(GameState):
             
             if team == 'red':
                 self.__red.append(player)
-                self.server.send_chat(('%s joined the red ' +
+                self.chat.send_chat(('%s joined the red ' +
                     'team.') % player.name)
             elif team == 'blue':
                 self.__blue.append(player)
-                self.server.send_chat(('%s joined the blue ' +
+                self.chat.send_chat(('%s joined the blue ' +
                     'team.') % player.name)
             else:
                 self.__spectators.append(player)
-                self.server.send_chat('%s joined the spectators.' %
+                self.chat.send_chat('%s joined the spectators.' %
                     player.name)
                 
     def player_join(self, player):
@@ -393,8 +472,7 @@ class GameChooseState(GameState):
         
         """
         self.__to_choose.append(player)
-        relation = self.server.config.capture_the_flag.relation_between_matches
-        self._set_relation_all(relation)
+        self._apply_relations_of(player)
         
     def player_leave(self, player):
         """Method for handling a player leave event.
@@ -431,38 +509,102 @@ class GameChooseState(GameState):
         return len(self.__red) > 0 and len(self.__blue) > 0
         
                
-class GameInitialisingState(GameState):
+class GameTeamState(GameState):
+    """Parent class of the states with fixed teams, team mates are
+    friendly, the teams hostile to each other and everybody is friendly
+    to spectators.
+    
+    """
+    def __init__(self, server, arena, red, blue):
+        """Initializes the GameTeamState.
+        
+        Keyword arguments:
+        server -- Current server instance
+        arena -- Arena the state belongs to
+        red -- Players of the red team
+        blue -- Players of the blue team
+        
+        """
+        GameState.__init__(self, server, arena)
+        # team of each player, spectators have none
+        self.__teams = {}
+        for p in red:
+            self.__teams[p] = 'red'
+        for p in blue:
+            self.__teams[p] = 'blue'
+        
+    def relation_between(self, player1, player2):
+        """Gets the relation one player should have to another.
+        
+        Keyword arguments:
+        player1 -- The player the relation is from
+        player2 -- The player the relation is to
+        
+        Return value:
+        The relation
+        
+        """
+        team2 = self.__teams.get(player2)
+        if team2 is None:
+            return RELATION_FRIENDLY
+        team1 = self.__teams.get(player1)
+        if team1 is None or team1 == team2:
+            return RELATION_FRIENDLY_PLAYER
+        return RELATION_HOSTILE
+        
+    def _leave_team(self, player):
+        """Removes a player from their team.
+        
+        Keyword arguments:
+        player -- The player
+        
+        """
+        self.__teams.pop(player, None)
+        
+        
+class GameInitialisingState(GameTeamState):
     """State just before the game starts, time to got to your flag!"""
-    def __init__(self, server, ctfscript, pre_game_state, red, blue,
+    def __init__(self, server, arena, pre_game_state, red, blue,
         spectators, points):
-        GameState.__init__(self, server, ctfscript)
+        GameTeamState.__init__(self, server, arena, red, blue)
         self.__red = red
         self.__blue = blue
         self.__pre_game_state = pre_game_state
         self.__spectators = spectators;
         self.__points = points
         
-        lm = self.ctfscript.loot_manager
+        lm = self.arena.loot_manager
         lm.new_match()
-        if server.config.capture_the_flag.loot:
-            self.server.send_chat(lm.pre_game_message)
+        if self.config.loot:
+            self.chat.send_chat(lm.pre_game_message)
         if points > 1:
-            server.send_chat(('You need %i points to win the' + 
+            self.chat.send_chat(('You need %i points to win the' + 
                 ' match!') % points)
         else:
-            server.send_chat('First flag stolen wins!')
+            self.chat.send_chat('First flag stolen wins!')
         self._send_chat('You are in the red team.', red)
         self._send_chat('You are in the blue team.', blue)
-        server.send_chat('The game is about to begin!')
+        self.chat.send_chat('The game is about to begin!')
         self.__counter = 11.0
         self.__last_time = datetime.now()
+        # the teams are fixed, so their relations are spread over the
+        # countdown, on_hit keeps them from fighting before the start
+        self.apply_relations()
+        
+    def on_hit(self, attacker, target_entity):
+        """Method for handling an on_hit event.
+        
+        Keyword arguments:
+        attacker -- Attacking entity
+        target_entity -- Attacked entity
+        
+        """
+        return False
         
     def update(self):
         """Method for handling update logic."""
-        s = self.ctfscript
-        for p in self.__spectators:
-            p.entity.pos = Vector3(0, 0, 0)
-            p.entity.mask |= MASK_POSITION
+        s = self.arena
+        self._pin_spectators(self.__spectators)
 
         now = datetime.now()
         dif = (now - self.__last_time).total_seconds()
@@ -472,7 +614,7 @@ class GameInitialisingState(GameState):
         new_ceil = math.ceil(self.__counter)
         old_floor = math.floor(last_counter)
         if new_ceil == old_floor and new_ceil > 0 and new_ceil < 11:
-            self.server.send_chat('%i' % new_ceil)
+            self.chat.send_chat('%i' % new_ceil)
         if self.__counter < 0:
             s.game_state = GameRunningState(self.server, s, self.__red,
                 self.__blue, self.__spectators, self.__points)
@@ -485,37 +627,35 @@ class GameInitialisingState(GameState):
         
         """
         self.__spectators.append(player)
-        relation = self.server.config.capture_the_flag.relation_between_matches
-        self._set_relation_all(relation)
+        self._apply_relations_of(player)
             
     def on_leave(self):
         """Mehtod for handling (any) players leave."""
-        s = self.server
-        self.ctfscript.game_state = self.__pre_game_state
-        s.send_chat(self.__pre_game_state.startgame(None,
+        self.arena.game_state = self.__pre_game_state
+        self.chat.send_chat(self.__pre_game_state.startgame(None,
             self.__points, True))
-        s.send_chat(('The game was not started because a player left' +
-            ' the game.'))
+        self.chat.send_chat(('The game was not started because a player ' +
+            'left the game.'))
         
        
-class GameRunningState(GameState):
+class GameRunningState(GameTeamState):
     """State for the running game."""
-    def __init__(self, server, ctfscript, red, blue, spectators,
+    def __init__(self, server, arena, red, blue, spectators,
         points):
-        GameState.__init__(self, server, ctfscript)
+        GameTeamState.__init__(self, server, arena, red, blue)
         self.__red = red
         self.__blue = blue
         self.__spectators = spectators
         self.__points_needed = points
         self.__points_blue = 0
         self.__points_red = 0
-        self._set_relation_all(RELATION_FRIENDLY_PLAYER)
-        self.__make_friendly(self.__red)
-        self.__make_friendly(self.__blue)
-        self.__make_hostile(self.__red, self.__blue)
+        # living players of each team, rebuilt every tick
+        self.__red_hash = SpatialHash(FLAG_CAPTURE_DISTANCE)
+        self.__blue_hash = SpatialHash(FLAG_CAPTURE_DISTANCE)
+        # the team relations got staged when the countdown started
         
-        fpb = ctfscript.flag_pole_pos_blue
-        fpr = ctfscript.flag_pole_pos_red
+        fpb = arena.flag_pole_pos_blue
+        fpr = arena.flag_pole_pos_red
         self.__arena_center = fpr.xy + 0.5 * (fpb.xy - fpr.xy)
         self.__arena_size = 2 * abs(fpr.xy - fpb.xy)
         
@@ -527,44 +667,22 @@ class GameRunningState(GameState):
             p.entity.teleport(fpr)
             p.entity.heal(p.entity.get_max_hp())
             p.port_immune_time = 0
-        for c in ctfscript.children:
-            c.init_game()
+        # the teleports above must not count as moving too fast
+        for p in arena.players.values():
+            arena.speed_cap.reset(p)
 
-        self.server.send_chat('Go!')
+        self.chat.send_chat('Go!')
         self.__play_sound(SOUND_EXPLOSION)
 
         self.__last_time = datetime.now()
-        
-    def __make_friendly(self, players):
-        """Makes the given players friendly to each other.
-        
-        Keyword arguments:
-        players -- Players to make friendly
-        
-        """
-        for p1 in players:
-            for p2 in players:
-                p1.entity.set_relation_to(p2.entity, RELATION_FRIENDLY_PLAYER)
-                    
-    def __make_hostile(self, players1, players2):
-        """Makes the given player groups hostile to each other.
-        
-        Keyword arguments:
-        players1 -- First group of players
-        players2 -- Second group of players
-        
-        """
-        for p1 in players1:
-            for p2 in players2:
-                p1.entity.set_relation_both(p2.entity, RELATION_HOSTILE)
                     
     def __play_sound(self, index):
-        """Plays a sound for all clients.
+        """Plays a sound for all players of the arena.
         
         Keyword arguments:
         index -- Index of the sound to play
         """
-        for p in self.server.players.values():
+        for p in self.arena.players.values():
             sound = SoundAction()
             sound.sound_index = index
             sound.pitch = 1.0
@@ -580,8 +698,7 @@ class GameRunningState(GameState):
         
         """
         self.__spectators.append(player)
-        for p in self.server.players:
-            p.entity.set_relation_to(player, RELATION_FRIENDLY)
+        self._apply_relations_of(player)
         
     def player_leave(self, player):
         """Method for handling a player leave event.
@@ -592,24 +709,25 @@ class GameRunningState(GameState):
         """
         if player in self.__red:
             self.__red.remove(player)
-            fb = self.ctfscript.flag_blue
+            fb = self.arena.flag_blue
             if fb.carrier == player:
                 fb.carrier = None
-                self.server.send_chat('The blue flag got dropped!')
+                self.chat.send_chat('The blue flag got dropped!')
         elif player in self.__blue:
             self.__blue.remove(player)
-            fr = self.ctfscript.flag_red
+            fr = self.arena.flag_red
             if fr.carrier == player:
                 fr.carrier = None
-                self.server.send_chat('The red flag got dropped!')
+                self.chat.send_chat('The red flag got dropped!')
         elif player in self.__spectators:
             self.__spectators.remove(player)
+        self._leave_team(player)
         
         if not self.__red and not self.__blue:
-            ctfscript = self.ctfscript
+            arena = self.arena
             server = self.server
-            ctfscript.game_state = PreGameState(server, ctfscript)
-            server.send_chat('Game aborted because all players left.')
+            arena.game_state = PreGameState(server, arena)
+            self.chat.send_chat('Game aborted because all players left.')
     
     def on_hit(self, attacker, target_entity):
         """Method for handling an on_hit event.
@@ -629,7 +747,7 @@ class GameRunningState(GameState):
         killed -- Killed entity
 
         """
-        if self.server.config.capture_the_flag.xp_on_kill:
+        if self.config.xp_on_kill:
             kill_action = KillAction()
             kill_action.entity_id = killer.entity_id
             kill_action.target_id = killed.entity_id
@@ -644,13 +762,13 @@ class GameRunningState(GameState):
         player -- The player who was too fast
         
         """
-        s = self.ctfscript
+        s = self.arena
         if s.flag_red.carrier == player:
             s.flag_red.carrier = None
-            self.server.send_chat('The red flag got dropped!')
+            self.chat.send_chat('The red flag got dropped!')
         elif s.flag_blue.carrier == player:
             s.flag_blue.carrier = None
-            self.server.send_chat('The blue flag got dropped!')
+            self.chat.send_chat('The blue flag got dropped!')
         
     def on_respawn(self, entity):
         """Called when a player respawned.
@@ -659,8 +777,8 @@ class GameRunningState(GameState):
         entity -- The respawned entity.
         
         """
-        s = self.ctfscript
-        player = self.server.players[entity.entity_id]
+        s = self.arena
+        player = self.arena.players[entity.entity_id]
         player.port_immune_time = 3.0
         if player in self.__blue:
             entity.teleport(s.flag_pole_pos_blue)
@@ -669,7 +787,7 @@ class GameRunningState(GameState):
 
     def update(self):
         """Method for handling update logic."""
-        s = self.ctfscript
+        s = self.arena
         r = self.__red
         b = self.__blue
         fr = s.flag_red
@@ -679,9 +797,7 @@ class GameRunningState(GameState):
         
         se = self.server
         
-        for p in self.__spectators:
-            p.entity.pos = Vector3(0, 0, 0)
-            p.entity.mask |= MASK_POSITION
+        self._pin_spectators(self.__spectators)
 
         now = datetime.now()
         dif = (now - self.__last_time).total_seconds()
@@ -699,27 +815,31 @@ class GameRunningState(GameState):
                 to_center = to_center * 20 * BLOCK_SCALE
                 pos = p.entity.pos
                 new_pos = Vector3(pos.x + to_center.x, pos.y + to_center.y, 0)
-                world = self.ctfscript.world
+                world = self.arena.world
                 new_pos.z = world.get_height(new_pos.xy) or pos.z
                 p.entity.teleport(new_pos)
         
-        if self.__handle_team(r, b, fr, fpr, fpb):
+        rh = self.__red_hash
+        bh = self.__blue_hash
+        self.__fill_hash(rh, r)
+        self.__fill_hash(bh, b)
+        if self.__handle_team(rh, bh, fr, fpr, fpb):
             self.__points_blue = self.__points_blue + 1
             if self.__points_blue < self.__points_needed:
-                se.send_chat('Red: %i' % self.__points_red)
-                se.send_chat('Blue: %i' % self.__points_blue)
-                se.send_chat('The current score is:')
-                se.send_chat('The blue team got one point!')
+                self.chat.send_chat('The blue team got one point!')
+                self.chat.send_chat('The current score is:')
+                self.chat.send_chat('Red: %i' % self.__points_red)
+                self.chat.send_chat('Blue: %i' % self.__points_blue)
                 self.__play_sound(SOUND_LEVEL_UP)
                 fr.carrier = None
                 fr.pos = fpr.pos
-        if self.__handle_team(b, r, fb, fpb, fpr):
+        if self.__handle_team(bh, rh, fb, fpb, fpr):
             self.__points_red = self.__points_red + 1
             if self.__points_red < self.__points_needed:
-                se.send_chat('Red: %i' % self.__points_red)
-                se.send_chat('Blue: %i' % self.__points_blue)
-                se.send_chat('The current score is:')
-                se.send_chat('The red team got one point!')
+                self.chat.send_chat('The red team got one point!')
+                self.chat.send_chat('The current score is:')
+                self.chat.send_chat('Red: %i' % self.__points_red)
+                self.chat.send_chat('Blue: %i' % self.__points_blue)
                 self.__play_sound(SOUND_LEVEL_UP)
                 fb.carrier = None
                 fb.pos = fpb.pos
@@ -728,25 +848,38 @@ class GameRunningState(GameState):
         pr = self.__points_red >= self.__points_needed
         if pb or pr:
             if pr: # Red wins
-                se.send_chat('Red team wins!')
-                self.ctfscript.loot_manager.give_loot(self.__red)
+                self.chat.send_chat('Red team wins!')
+                self.arena.loot_manager.give_loot(self.__red)
                 self.__give_xp(self.__red)
             elif pb: # Blue wins
-                se.send_chat('Blue team wins!')
-                self.ctfscript.loot_manager.give_loot(self.__blue)
+                self.chat.send_chat('Blue team wins!')
+                self.arena.loot_manager.give_loot(self.__blue)
                 self.__give_xp(self.__blue)
             else: # Draw
-                se.send_chat('The game ended in a draw!')
+                self.chat.send_chat('The game ended in a draw!')
             self.__play_sound(SOUND_MISSION_COMPLETE)
             s.game_state = PreGameState(se, s)
         
+    def __fill_hash(self, spatial_hash, team):
+        """Fills a spatial hash with the living players of a team.
+        
+        Keyword arguments:
+        spatial_hash -- SpatialHash to fill
+        team -- The team
+        
+        """
+        spatial_hash.clear()
+        for p in team:
+            if p.entity.hp > 0:
+                spatial_hash.insert(p, p.position)
+        
     def __handle_team(self, team, enemy_team, own_flag,
         own_pole, enemy_pole):
         """Handles the update logic for one team.
         
         Keyword arguments:
-        team -- Team to handle
-        enemy_team -- Other team
+        team -- SpatialHash of the living players of the handled team
+        enemy_team -- SpatialHash of the living players of the other team
         own_flag -- Flag of the handled team
         own_pole -- Flag pole of the handled team
         enemy_pole -- Flag pole of the other team
@@ -755,41 +888,33 @@ class GameRunningState(GameState):
         if own_flag.carrier is None:
             ofp = own_flag.pos
             if not self._equals(ofp, own_pole.pos):
-                for p in team:
-                    if p.entity.hp > 0:
-                        pos = p.position
-                        if self._distance(pos, ofp) < \
-                            FLAG_CAPTURE_DISTANCE:
-                            own_flag.pos = own_pole.pos
-                            fn = own_flag.name
-                            s = self.server
-                            s.send_chat(('The %s flag has been ' +
-                                'resetted!') % fn)
-                            self.__play_sound(SOUND_GATE)
-                            break
-            for p in enemy_team:
-                if p.entity.hp > 0:
-                    pos = p.position
-                    if self._distance(pos, ofp) < FLAG_CAPTURE_DISTANCE:
-                        own_flag.carrier = p
-                        fn = own_flag.name
-                        n = p.entity.name
-                        s = self.server
-                        s.send_chat('%s picked up the %s flag!' % (n, fn))
-                        self.__play_sound(SOUND_LICH_SCREAM)
-                        break
+                if team.find(ofp, FLAG_CAPTURE_DISTANCE) is not None:
+                    own_flag.pos = own_pole.pos
+                    fn = own_flag.name
+                    self.chat.send_chat(('The %s flag has been ' +
+                        'resetted!') % fn)
+                    self.__play_sound(SOUND_GATE)
+            p = enemy_team.find(ofp, FLAG_CAPTURE_DISTANCE)
+            if p is not None:
+                own_flag.carrier = p
+                fn = own_flag.name
+                n = p.entity.name
+                self.chat.send_chat('%s picked up the %s flag!' %
+                    (n, fn))
+                self.__play_sound(SOUND_LICH_SCREAM)
         if own_flag.carrier is not None:
             if own_flag.carrier.entity.hp <= 0:
                 # Carrier was killed
                 own_flag.carrier = None
                 fn = own_flag.name
-                self.server.send_chat('The %s flag got dropped!' % fn)
+                self.chat.send_chat('The %s flag got dropped!' % fn)
                 return False
             else:
                 p = own_flag.carrier.position  
                 own_flag.pos = p
                 ep = enemy_pole.pos
-                if self._distance(p, ep) < FLAG_CAPTURE_DISTANCE:
+                if self._distance_squared(p, ep) < \
+                    FLAG_CAPTURE_DISTANCE_SQUARED:
                     # Carrier (enemy) carried flag to his pole
                     return True
                 else:
@@ -804,7 +929,7 @@ class GameRunningState(GameState):
         players -- Players who will gain the XP
         
         """
-        if self.server.config.capture_the_flag.xp_on_win:
+        if self.config.xp_on_win:
             xp = (len(self.__red) + len(self.__blue)) * \
                 self.__points_needed
             item = ItemData()
@@ -0,0 +1,154 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Non-blocking log output and coalesced chat messages."""
+
+
+import queue
+import threading
+
+
+class AsyncLogWriter:
+    """Writes log lines to the console and optionally to a file.
+
+    Lines are handed to a background thread through a queue, so a slow
+    terminal or disk never stalls the game thread.
+
+    """
+    def __init__(self, path=None, console=True):
+        """Creates a new AsyncLogWriter and starts its thread.
+
+        Keyword arguments:
+        path -- Path of a file to append the lines to, or None
+        console -- True, to print the lines to the console
+
+        """
+        self.__path = path
+        self.__console = console
+        self.__queue = queue.Queue()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def write(self, line):
+        """Queues a line for writing.
+
+        Keyword arguments:
+        line -- The line to write, without a trailing newline
+
+        """
+        self.__queue.put(line)
+
+    def close(self, timeout=5.0):
+        """Writes all queued lines and stops the thread.
+
+        Keyword arguments:
+        timeout -- Maximum time in seconds to wait for the thread
+
+        """
+        self.__queue.put(None)
+        self.__thread.join(timeout)
+
+    def __run(self):
+        """Main loop of the writer thread."""
+        file = None
+        if self.__path is not None:
+            file = open(self.__path, 'a')
+        try:
+            q = self.__queue
+            while True:
+                line = q.get()
+                if line is None:
+                    break
+                if self.__console:
+                    print(line)
+                if file is not None:
+                    file.write(line + '\n')
+                    if q.empty():
+                        file.flush()
+        finally:
+            if file is not None:
+                file.close()
+
+
+class ChatBuffer:
+    """Collects chat messages and sends all lines with the same audience
+    in one message once per tick.
+
+    """
+    def __init__(self, server):
+        """Creates a new ChatBuffer.
+
+        Keyword arguments:
+        server -- Current server instance
+
+        """
+        self.__server = server
+        self.__lines = {}
+
+    def send_chat(self, msg):
+        """Queues a message to all players.
+
+        Keyword arguments:
+        msg -- The message to send
+
+        """
+        self.__queue(None, msg)
+
+    def send_chat_to(self, player, msg):
+        """Queues a message to a single player.
+
+        Keyword arguments:
+        player -- The player to send the message to
+        msg -- The message to send
+
+        """
+        self.__queue(player, msg)
+
+    def __queue(self, audience, msg):
+        """Queues a message for an audience.
+
+        Keyword arguments:
+        audience -- The player receiving the message, None for all
+        msg -- The message to send
+
+        """
+        lines = self.__lines.get(audience)
+        if lines is None:
+            self.__lines[audience] = [msg]
+        else:
+            lines.append(msg)
+
+    def flush(self):
+        """Sends all queued messages. Should be called once per tick."""
+        if not self.__lines:
+            return
+        pending = self.__lines
+        self.__lines = {}
+        for audience, lines in pending.items():
+            msg = '\n'.join(lines)
+            if audience is None:
+                self.__server.send_chat(msg)
+            else:
+                audience.send_chat(msg)
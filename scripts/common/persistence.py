@@ -0,0 +1,134 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Debounced write-behind persistence of settings."""
+
+
+import copy
+import json
+import os
+import os.path
+import threading
+
+
+class SettingsWriter:
+    """Writes settings to a JSON file from a background thread.
+
+    Changes are only marked in memory. The thread waits for a short
+    debounce window so a burst of changes results in a single write and
+    replaces the file atomically.
+
+    """
+    def __init__(self, path, delay=2.0):
+        """Creates a new SettingsWriter and starts its thread.
+
+        Keyword arguments:
+        path -- Path of the JSON file
+        delay -- Debounce window in seconds
+
+        """
+        self.__path = path
+        self.__delay = delay
+        self.__condition = threading.Condition()
+        self.__pending = None
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def mark_dirty(self, settings):
+        """Marks the settings as changed.
+
+        Keyword arguments:
+        settings -- The settings to write, they are copied
+
+        """
+        snapshot = copy.deepcopy(settings)
+        with self.__condition:
+            notify = self.__pending is None
+            self.__pending = snapshot
+            if notify:
+                self.__condition.notify()
+
+    def close(self):
+        """Writes pending changes immediately and stops the thread."""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+        self.__thread.join()
+
+    def __run(self):
+        """Main loop of the writer thread."""
+        condition = self.__condition
+        while True:
+            with condition:
+                while self.__pending is None and not self.__closed:
+                    condition.wait()
+                if not self.__closed:
+                    # collect further changes, close() cuts this short
+                    condition.wait(self.__delay)
+                settings = self.__pending
+                self.__pending = None
+                closed = self.__closed
+            if settings is not None:
+                self.__write(settings)
+            if closed:
+                return
+
+    def __write(self, settings):
+        """Atomically replaces the file with the given settings.
+
+        Keyword arguments:
+        settings -- The settings to write
+
+        """
+        path = self.__path
+        tmp_path = path + '.tmp'
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(tmp_path, 'w') as f:
+                json.dump(settings, f, indent=4, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print('Could not save %s: %s' % (path, e))
+
+
+def load_settings(path):
+    """Loads settings written by a SettingsWriter.
+
+    Keyword arguments:
+    path -- Path of the JSON file
+
+    Return value:
+    The settings or None if the file does not exist
+
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
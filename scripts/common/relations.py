@@ -0,0 +1,274 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Bookkeeping of the relations applied between entities."""
+
+
+from array import array
+
+
+# Marks a pair without a known relation
+RELATION_UNKNOWN = 0
+
+
+class RelationMatrix:
+    """Remembers the last relation applied between each ordered pair of
+    entities, so calls that would change nothing can be skipped.
+
+    Every registered entity owns a dense slot, the relations are stored
+    in a flat byte array indexed by the slots of both entities.
+
+    """
+    def __init__(self, capacity=32):
+        """Creates a new RelationMatrix.
+
+        Keyword arguments:
+        capacity -- Initial number of slots
+
+        """
+        self.__capacity = capacity
+        self.__relations = array('B', bytes(capacity * capacity))
+        self.__slots = {}
+        self.__free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        """Returns the number of registered entities."""
+        return len(self.__slots)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.__slots
+
+    def remove(self, entity_id):
+        """Frees the slot of an entity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        """
+        slot = self.__slots.pop(entity_id, None)
+        if slot is not None:
+            self.__free.append(slot)
+
+    def clear(self):
+        """Forgets all relations and entities."""
+        self.__init__(self.__capacity)
+
+    def get(self, from_id, to_id):
+        """Gets the relation last applied between two entities.
+
+        Keyword arguments:
+        from_id -- Id of the entity the relation is from
+        to_id -- Id of the entity the relation is to
+
+        Return value:
+        The relation or RELATION_UNKNOWN
+
+        """
+        slots = self.__slots
+        if from_id not in slots or to_id not in slots:
+            return RELATION_UNKNOWN
+        return self.__relations[slots[from_id] * self.__capacity +
+                                slots[to_id]]
+
+    def record(self, from_id, to_id, relation):
+        """Records a relation without applying it, e.g. after it got
+        changed from elsewhere.
+
+        Keyword arguments:
+        from_id -- Id of the entity the relation is from
+        to_id -- Id of the entity the relation is to
+        relation -- The relation now in effect
+
+        """
+        i = self.__slot(from_id)
+        j = self.__slot(to_id)
+        self.__relations[i * self.__capacity + j] = relation
+
+    def apply(self, from_entity, to_entity, relation):
+        """Sets the relation of one entity to another unless it is
+        already in effect.
+
+        Keyword arguments:
+        from_entity -- Entity the relation is from
+        to_entity -- Entity the relation is to
+        relation -- The relation
+
+        Return value:
+        True, if set_relation_to was called, otherwise False
+
+        """
+        i = self.__slot(from_entity.entity_id)
+        j = self.__slot(to_entity.entity_id)
+        index = i * self.__capacity + j
+        if self.__relations[index] == relation:
+            return False
+        # record first, so the resulting change event is recognized
+        self.__relations[index] = relation
+        from_entity.set_relation_to(to_entity, relation)
+        return True
+
+    def apply_both(self, entity1, entity2, relation):
+        """Sets the relation between two entities in both directions.
+
+        Keyword arguments:
+        entity1 -- First entity
+        entity2 -- Second entity
+        relation -- The relation
+
+        Return value:
+        The number of set_relation_to calls made
+
+        """
+        count = 0
+        if self.apply(entity1, entity2, relation):
+            count += 1
+        if entity1 is not entity2 and self.apply(entity2, entity1, relation):
+            count += 1
+        return count
+
+    def __slot(self, entity_id):
+        """Gets the slot of an entity, registering it if necessary.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        Return value:
+        The slot
+
+        """
+        slot = self.__slots.get(entity_id)
+        if slot is not None:
+            return slot
+        if not self.__free:
+            self.__grow()
+        slot = self.__free.pop()
+        self.__slots[entity_id] = slot
+        # a reused slot may still hold the relations of its last owner
+        capacity = self.__capacity
+        empty = array('B', bytes(capacity))
+        row = slot * capacity
+        self.__relations[row:row + capacity] = empty
+        self.__relations[slot::capacity] = empty
+        return slot
+
+    def __grow(self):
+        """Doubles the number of slots."""
+        old = self.__capacity
+        new = old * 2
+        relations = array('B', bytes(new * new))
+        for i in range(old):
+            relations[i * new:i * new + old] = \
+                self.__relations[i * old:(i + 1) * old]
+        self.__relations = relations
+        self.__capacity = new
+        self.__free.extend(range(new - 1, old - 1, -1))
+
+
+class RelationBatch:
+    """Collects relation changes during a tick and applies them at once.
+
+    Only the last relation staged for an ordered pair is kept, and it is
+    applied through a RelationMatrix, so a pair that is changed back
+    and forth within a tick costs at most one call.
+
+    """
+    def __init__(self, matrix):
+        """Creates a new, empty RelationBatch.
+
+        Keyword arguments:
+        matrix -- RelationMatrix the changes are applied through
+
+        """
+        self.__matrix = matrix
+        # (from id, to id) -> (from entity, to entity, relation)
+        self.__staged = {}
+
+    def __len__(self):
+        """Returns the number of staged pairs."""
+        return len(self.__staged)
+
+    def stage(self, from_entity, to_entity, relation):
+        """Stages the relation of one entity to another.
+
+        Keyword arguments:
+        from_entity -- Entity the relation is from
+        to_entity -- Entity the relation is to
+        relation -- The relation
+
+        """
+        self.__staged[(from_entity.entity_id, to_entity.entity_id)] = (
+            from_entity, to_entity, relation)
+
+    def stage_both(self, entity1, entity2, relation):
+        """Stages the relation between two entities in both directions.
+
+        Keyword arguments:
+        entity1 -- First entity
+        entity2 -- Second entity
+        relation -- The relation
+
+        """
+        self.stage(entity1, entity2, relation)
+        if entity1 is not entity2:
+            self.stage(entity2, entity1, relation)
+
+    def remove(self, entity_id):
+        """Drops all staged changes involving an entity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        """
+        if self.__staged:
+            self.__staged = {key : value for key, value in
+                             self.__staged.items() if entity_id not in key}
+
+    def flush(self, budget=None):
+        """Applies the staged changes.
+
+        Keyword arguments:
+        budget -- Maximum number of set_relation_to calls to make, the
+                  remaining changes stay staged. None for no limit
+
+        Return value:
+        The number of set_relation_to calls made
+
+        """
+        staged = self.__staged
+        if not staged:
+            return 0
+        apply = self.__matrix.apply
+        count = 0
+        if budget is None:
+            self.__staged = {}
+            for from_entity, to_entity, relation in staged.values():
+                if apply(from_entity, to_entity, relation):
+                    count += 1
+            return count
+        while staged and count < budget:
+            from_entity, to_entity, relation = staged.popitem()[1]
+            if apply(from_entity, to_entity, relation):
+                count += 1
+        return count
@@ -0,0 +1,154 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Hierarchical timer wheel for scheduling many timers cheaply."""
+
+
+import math
+
+
+# Default layout of the timer wheel
+DEFAULT_SLOT_BITS = 8
+DEFAULT_LEVELS = 4
+
+
+class TimerWheel:
+    """Hierarchical timer wheel.
+
+    Timers are stored in a few wheels of increasing granularity. Every
+    tick only the current slot of the innermost wheel is looked at,
+    timers of the outer wheels are cascaded inwards whenever the inner
+    wheel wraps around. A tick without due timers is therefore O(1).
+
+    """
+    def __init__(self, resolution, now, slot_bits=DEFAULT_SLOT_BITS,
+        levels=DEFAULT_LEVELS):
+        """Creates a new TimerWheel.
+
+        Keyword arguments:
+        resolution -- Length of a single tick in seconds
+        now -- Current (monotonic) time in seconds
+        slot_bits -- Number of bits per wheel (a wheel has
+                     2 ** slot_bits slots)
+        levels -- Number of wheels
+
+        """
+        self.__resolution = float(resolution)
+        self.__start = now
+        self.__bits = slot_bits
+        self.__mask = (1 << slot_bits) - 1
+        self.__levels = levels
+        self.__wheels = [[[] for _ in range(1 << slot_bits)]
+                         for _ in range(levels)]
+        self.__tick = 0
+        self.__count = 0
+
+    def __len__(self):
+        """Returns the number of pending timers."""
+        return self.__count
+
+    def schedule(self, delay, item):
+        """Schedules an item.
+
+        Keyword arguments:
+        delay -- Delay in seconds after which the item is due
+        item -- The item to schedule
+
+        """
+        ticks = max(1, int(math.ceil(delay / self.__resolution)))
+        self.__insert(self.__tick + ticks, item)
+        self.__count += 1
+
+    def advance(self, now):
+        """Advances the wheel to the given time.
+
+        Keyword arguments:
+        now -- Current (monotonic) time in seconds
+
+        Return value:
+        A list of all items that became due
+
+        """
+        target = int((now - self.__start) / self.__resolution)
+        due = []
+        if self.__count == 0:
+            if target > self.__tick:
+                self.__tick = target
+            return due
+
+        mask = self.__mask
+        inner = self.__wheels[0]
+        while self.__tick < target:
+            self.__tick += 1
+            tick = self.__tick
+            if tick & mask == 0:
+                self.__cascade(tick)
+            slot = inner[tick & mask]
+            if slot:
+                for expires, item in slot:
+                    due.append(item)
+                self.__count -= len(slot)
+                slot.clear()
+                if self.__count == 0:
+                    self.__tick = target
+                    break
+        return due
+
+    def __cascade(self, tick):
+        """Moves the timers of the outer wheels one level inwards.
+
+        Keyword arguments:
+        tick -- The tick the inner wheel wrapped around at
+
+        """
+        bits = self.__bits
+        mask = self.__mask
+        for level in range(1, self.__levels):
+            shift = level * bits
+            slot = self.__wheels[level][(tick >> shift) & mask]
+            if slot:
+                entries = list(slot)
+                slot.clear()
+                for expires, item in entries:
+                    self.__insert(expires, item)
+            if (tick >> shift) & mask != 0:
+                break
+
+    def __insert(self, expires, item):
+        """Inserts a timer into the wheel matching its expiry.
+
+        Keyword arguments:
+        expires -- Tick the timer expires at
+        item -- The scheduled item
+
+        """
+        bits = self.__bits
+        delta = expires - self.__tick
+        level = 0
+        while level < self.__levels - 1 and \
+            delta >> ((level + 1) * bits) > 0:
+            level += 1
+        index = (expires >> (level * bits)) & self.__mask
+        self.__wheels[level][index].append((expires, item))
@@ -0,0 +1,261 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2014-2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Random events script for cuwo."""
+
+
+import random
+import shutil
+import time
+
+
+from cuwo.script import ConnectionScript
+from cuwo.script import ServerScript
+from cuwo.script import admin
+from cuwo.script import command
+
+
+from ..common.output import AsyncLogWriter
+from ..common.output import ChatBuffer
+
+
+from .budget import POLICY_DEFER
+from .budget import POLICY_RUN
+from .budget import TickMonitor
+from .effects import EFFECTS
+from .effects import StatusEffectEngine
+from .effects import check_effect_config
+from .events import EventTable
+from .grid import SpatialGrid
+from .journal import EventJournal
+from .pools import CATEGORIES
+from .pools import CATEGORY_ALL
+from .pools import CATEGORY_PLAYERS
+from .pools import EntityPools
+from .scheduler import EventScheduler
+
+
+# Path to the config files
+DEFAULT_CONFIG_FILE = 'scripts/random_events/default_config.py'
+CONFIG_FILE = 'config/random_events.py'
+
+
+# Maximum number of entities checked per tick to keep the pools in sync
+SYNC_BUDGET = 200
+
+
+class RandomEventConnectionScript(ConnectionScript):
+    def on_entity_update(self, event):
+        self.parent.pools.update(self.connection.entity)
+        
+    def on_unload(self):
+        entity_id = self.connection.entity.entity_id
+        self.parent.pools.remove(entity_id)
+        self.parent.effects.clear(entity_id)
+
+
+class RandomEventScript(ServerScript):
+    connection_class = RandomEventConnectionScript
+    
+    def on_load(self):
+        self.event_tables = {}
+        self.tick = 0
+        self.__grid_tick = -1
+        self.deferred_count = 0
+        self.dropped_count = 0
+        self.chat = ChatBuffer(self.server)
+        self.log = None
+        self.journal = None
+        self.pools = EntityPools(self.server.world.entities)
+        for entity in self.server.world.entities.values():
+            self.pools.update(entity)
+        self.effects = StatusEffectEngine(self.server.world.entities,
+            time.monotonic())
+        error = self.load_config()
+        if error is not None:
+            raise ValueError(error)
+        
+    def on_unload(self):
+        self.chat.flush()
+        self.log.close()
+        if self.journal is not None:
+            self.journal.close()
+        
+    def load_config(self):
+        """Loads the config from disk and creates a default file if
+        none exists. (Re)creates the event streams afterwards, event
+        tables are only recompiled if their weights changed.
+        
+        Return value:
+        None on success, otherwise a message why the config was
+        rejected. A rejected config leaves the script unchanged.
+        
+        """
+        try:
+            self.server.config.random_events
+        except (KeyError, FileNotFoundError):
+            shutil.copyfile(DEFAULT_CONFIG_FILE, CONFIG_FILE)
+            self.server.config.random_events
+            
+        config = self.server.config.random_events
+        # compile the tables first, so an invalid config changes nothing
+        tables = {}
+        for name, definition in config.streams.items():
+            weights = definition.get('events', config.events)
+            table = self.event_tables.get(name)
+            if table is None or table.weights != weights:
+                try:
+                    table = EventTable(weights)
+                except ValueError as e:
+                    return 'Invalid events of stream %s: %s' % (name, e)
+            tables[name] = table
+            category = (definition.get('target') or {}).get('category')
+            if category is not None and category not in CATEGORIES:
+                return 'Unknown target category of stream %s: %s' % (name,
+                    category)
+        for effect in EFFECTS:
+            try:
+                check_effect_config(getattr(config, effect))
+            except ValueError as e:
+                return 'Invalid %s effect: %s' % (effect, e)
+            
+        now = time.monotonic()
+        self.seed = config.seed
+        if self.seed is None:
+            self.seed = random.randrange(1 << 32)
+        self.scheduler = EventScheduler(config.resolution, now)
+        self.scheduler.set_streams(config.streams, self.seed)
+        self.event_tables = tables
+        self.grid = SpatialGrid(config.grid_cell_size)
+        self.__grid_tick = -1
+        self.tick_monitor = TickMonitor(config.tick_budget,
+            config.tick_window)
+        if self.log is not None:
+            self.log.close()
+        self.log = AsyncLogWriter(config.log_file)
+        self.log.write('Random events seed: %i' % self.seed)
+        for name, table in sorted(tables.items()):
+            for action in table.unknown:
+                self.log.write('Unknown random event action in stream ' +
+                    '%s: %s' % (name, action))
+        # a reload keeps the journal open, so its times stay monotonic
+        journal = self.journal
+        if journal is not None and journal.path == config.journal_file:
+            journal.reseed(self.seed)
+        else:
+            if journal is not None:
+                journal.close()
+                self.journal = None
+            if config.journal_file is not None:
+                self.journal = EventJournal(config.journal_file, self.seed,
+                    now)
+    
+    def update(self, event):
+        self.tick += 1
+        now = time.monotonic()
+        self.tick_monitor.record(now)
+        # players are kept up to date by their connection scripts, this
+        # catches spawned, changed and despawned NPCs
+        for entity_id in self.pools.sync(SYNC_BUDGET):
+            self.effects.clear(entity_id)
+        self.effects.update(now)
+        overloaded = self.tick_monitor.overloaded
+        for stream, defers in self.scheduler.update(now):
+            if overloaded and not self.handle_overload(stream, defers):
+                continue
+            self.do_something(stream, now)
+        self.chat.flush()
+            
+    def handle_overload(self, stream, defers):
+        """Applies the overload policy of a stream to one of its events.
+        
+        Keyword arguments:
+        stream -- The stream the event belongs to
+        defers -- How often the event has been deferred so far
+        
+        Return value:
+        True, if the event should run now, otherwise False
+        
+        """
+        config = self.server.config.random_events
+        policy = config.overload_policies.get(stream.priority, POLICY_RUN)
+        if policy == POLICY_RUN:
+            return True
+        if policy == POLICY_DEFER and defers < config.max_defers:
+            self.scheduler.defer(stream, config.defer_delay, defers + 1)
+            self.deferred_count += 1
+        else:
+            self.dropped_count += 1
+        return False
+            
+    def do_something(self, stream, now):
+        rng = stream.rng
+        name, action = self.event_tables[stream.name].sample(rng)
+        target = stream.target
+        if action.area:
+            category = target.get('category', CATEGORY_PLAYERS)
+        else:
+            category = target.get('category', CATEGORY_ALL)
+        entity = self.pools.choice(category, target.get('min_level'), rng)
+        if entity is not None:
+            params = action.roll(self, rng)
+            message = action.apply(self, entity, params)
+            if self.journal is not None:
+                self.journal.record(now, stream.name, entity.entity_id,
+                    name, params)
+            self.chat.send_chat(message)
+            self.log.write(message)
+            
+    def get_grid(self):
+        """Returns a spatial grid of all entities. The grid is built at
+        most once per tick and only if an event needs it.
+        
+        """
+        if self.__grid_tick != self.tick:
+            self.grid.build(self.server.world.entities.values())
+            self.__grid_tick = self.tick
+        return self.grid
+                
+def get_class():
+    return RandomEventScript
+    
+    
+@command
+@admin
+def reloadevents(script):
+    """Command for reloading the random events config."""
+    script.server.config.reload()
+    error = script.server.scripts.random_events.load_config()
+    if error is not None:
+        return 'Config rejected. %s' % error
+    return 'Random events config reloaded.'
+    
+    
+@command
+@admin
+def eventstats(script):
+    """Command for showing how many events were skipped due to load."""
+    events_script = script.server.scripts.random_events
+    return ('%i random events were deferred and %i dropped because the ' +
+        'server was overloaded.') % (events_script.deferred_count,
+        events_script.dropped_count)
\ No newline at end of file
@@ -0,0 +1,88 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Tracking of the server load."""
+
+
+# Possible policies for events while the server is overloaded
+POLICY_RUN = 'run'
+POLICY_DEFER = 'defer'
+POLICY_DROP = 'drop'
+
+
+class TickMonitor:
+    """Keeps track of the recent tick durations."""
+    def __init__(self, budget, window):
+        """Creates a new TickMonitor.
+
+        Keyword arguments:
+        budget -- Average tick duration in seconds above which the
+                  server is considered overloaded
+        window -- Number of recent ticks to average over
+
+        """
+        self.budget = budget
+        self.__durations = [0.0] * window
+        self.__index = 0
+        self.__total = 0.0
+        self.__last = None
+
+    def record(self, now):
+        """Records the start of a new tick.
+
+        Keyword arguments:
+        now -- Current (monotonic) time in seconds
+
+        """
+        last = self.__last
+        self.__last = now
+        if last is None:
+            return
+        duration = now - last
+        durations = self.__durations
+        i = self.__index
+        self.__total += duration - durations[i]
+        durations[i] = duration
+        self.__index = (i + 1) % len(durations)
+
+    @property
+    def average(self):
+        """Gets the average duration of the recent ticks.
+
+        Return value:
+        The average tick duration in seconds
+
+        """
+        return self.__total / len(self.__durations)
+
+    @property
+    def overloaded(self):
+        """Gets whether the server is currently behind.
+
+        Return value:
+        True, if the recent ticks took longer than the budget
+
+        """
+        return self.__total > self.budget * len(self.__durations)
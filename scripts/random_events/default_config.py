@@ -0,0 +1,79 @@
+# Resolution of the event scheduler in seconds. Event times are rounded up
+# to a multiple of this value.
+resolution = 0.1
+
+# Event streams. Every stream fires an event each 'period' seconds. If
+# 'jitter' is given, each interval is randomly shortened or lengthened by
+# up to that many seconds.
+# The targets of a stream can be restricted with a 'target' dict holding a
+# 'category' (one of 'all', 'players', 'npcs', 'hostile' and 'friendly')
+# and/or a 'min_level', e.g.
+# 'boss_hunt': {'period': 120.0, 'target': {'category': 'hostile',
+#                                           'min_level': 50}}
+# Without a category, area events target players and others target all
+# entities.
+streams = {
+    'default': {'period': 30.0, 'jitter': 0.0}
+}
+
+# Weights of the events a stream can choose from. An event with weight 2
+# happens twice as often as an event with weight 1, events with weight 0
+# never happen. A stream can use its own weights by adding an 'events' dict
+# to its definition, e.g.
+# 'healing': {'period': 60.0, 'events': {'heal': 1}}
+events = {
+    'damage': 1,
+    'heal': 1,
+    'kill': 1,
+    'stun': 1,
+    'meteor': 1,
+    'burn': 1,
+    'regenerate': 1
+}
+
+# Radius of a meteor strike in world units (65536 units are one block).
+# Everything within this radius around a random player gets damaged.
+meteor_radius = 20 * 65536
+
+# Status effects applied by the 'burn' and 'regenerate' events. Every
+# 'interval' seconds the entity takes 'amount' damage or is healed by
+# 'amount', until 'duration' seconds have passed.
+burning = {'amount': 100, 'interval': 1.0, 'duration': 10.0}
+regeneration = {'amount': 100, 'interval': 1.0, 'duration': 30.0}
+
+# Cell size of the grid used to find entities near a position. Should be
+# about as large as the largest area event radius.
+grid_cell_size = 20 * 65536
+
+# Load handling. If the recent ticks took longer than tick_budget seconds
+# on average (measured over the last tick_window ticks), the server is
+# considered to be behind. Events are then handled by the policy for the
+# priority of their stream (set via 'priority' in the stream definition,
+# default is 'normal'):
+# 'run': run the event anyway
+# 'defer': postpone the event by defer_delay seconds, at most max_defers
+#          times, afterwards it is dropped
+# 'drop': skip the event
+tick_budget = 0.04
+tick_window = 50
+overload_policies = {
+    'low': 'drop',
+    'normal': 'defer',
+    'high': 'run'
+}
+defer_delay = 5.0
+max_defers = 3
+
+# File the events are logged to in addition to the console, None to only
+# log to the console.
+log_file = None
+
+# Seed of the random events. With a fixed seed and the same world the same
+# events happen, None picks a new seed each time the config is loaded (the
+# seed is logged on load).
+seed = None
+
+# File every fired event is appended to, None to disable the journal. A
+# journal can be replayed offline with
+# python -m scripts.random_events.replay <journal file>
+journal_file = None
@@ -0,0 +1,205 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Timed status effects like burning or regeneration."""
+
+
+import heapq
+import itertools
+
+
+# Known status effects
+EFFECT_BURNING = 'burning'
+EFFECT_REGENERATION = 'regeneration'
+EFFECTS = (EFFECT_BURNING, EFFECT_REGENERATION)
+
+
+def check_effect_config(config):
+    """Checks the config entry of a status effect.
+
+    Keyword arguments:
+    config -- Dict with the amount, interval and duration of the effect
+
+    Raises a ValueError if the entry is invalid. An interval that is not
+    positive would make the effect due again at the same time forever.
+
+    """
+    for key in ('amount', 'interval', 'duration'):
+        value = config.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError('%s has to be a number.' % key)
+    if config['interval'] <= 0:
+        raise ValueError('interval has to be positive.')
+    if config['duration'] < 0:
+        raise ValueError('duration must not be negative.')
+
+
+class StatusEffect:
+    """A status effect applied to an entity in regular intervals."""
+    __slots__ = ['entity', 'kind', 'amount', 'interval', 'expires',
+                 'active']
+
+    def __init__(self, entity, kind, amount, interval, expires):
+        """Creates a new StatusEffect.
+
+        Keyword arguments:
+        entity -- The affected entity
+        kind -- Kind of the effect
+        amount -- Damage or healing per interval
+        interval -- Time between two applications in seconds
+        expires -- Time the effect ends at
+
+        """
+        self.entity = entity
+        self.kind = kind
+        self.amount = amount
+        self.interval = interval
+        self.expires = expires
+        self.active = True
+
+    def apply(self):
+        """Applies the effect once.
+
+        Return value:
+        True, if the effect should continue, otherwise False
+
+        """
+        entity = self.entity
+        if entity.hp <= 0:
+            return False
+        if self.kind == EFFECT_BURNING:
+            entity.damage(self.amount)
+        else:
+            entity.heal(self.amount)
+        return True
+
+
+class StatusEffectEngine:
+    """Keeps all active status effects in a heap ordered by the time
+    they are due next, so an update only touches due effects.
+
+    """
+    def __init__(self, entities, now):
+        """Creates a new StatusEffectEngine.
+
+        Keyword arguments:
+        entities -- The dict of all entities of the world, effects on
+                    entities no longer in it end
+        now -- Current (monotonic) time in seconds
+
+        """
+        self.__world_entities = entities
+        self.__heap = []
+        self.__by_entity = {}
+        self.__counter = itertools.count()
+        self.__count = 0
+        self.now = now
+
+    def __len__(self):
+        """Returns the number of active effects."""
+        return self.__count
+
+    def add(self, entity, kind, amount, interval, duration):
+        """Adds a status effect, starting now.
+
+        Keyword arguments:
+        entity -- The affected entity
+        kind -- Kind of the effect
+        amount -- Damage or healing per interval
+        interval -- Time between two applications in seconds
+        duration -- Duration of the effect in seconds
+
+        """
+        effect = StatusEffect(entity, kind, amount, interval,
+            self.now + duration)
+        effects = self.__by_entity.get(entity.entity_id)
+        if effects is None:
+            self.__by_entity[entity.entity_id] = [effect]
+        else:
+            effects.append(effect)
+        self.__count += 1
+        self.__push(self.now + interval, effect)
+
+    def clear(self, entity_id):
+        """Ends all effects on an entity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        """
+        effects = self.__by_entity.pop(entity_id, None)
+        if effects is not None:
+            self.__count -= len(effects)
+            # the heap entries are skipped once they are due
+            for effect in effects:
+                effect.active = False
+
+    def update(self, now):
+        """Applies all effects that are due.
+
+        Keyword arguments:
+        now -- Current (monotonic) time in seconds
+
+        """
+        self.now = now
+        heap = self.__heap
+        world_entities = self.__world_entities
+        while heap and heap[0][0] <= now:
+            due, _, effect = heapq.heappop(heap)
+            if not effect.active:
+                continue
+            entity = effect.entity
+            if world_entities.get(entity.entity_id) is not entity:
+                self.clear(entity.entity_id)
+                continue
+            if effect.apply() and due + effect.interval <= effect.expires:
+                self.__push(due + effect.interval, effect)
+            else:
+                self.__end(effect)
+
+    def __push(self, due, effect):
+        """Pushes an effect onto the heap.
+
+        Keyword arguments:
+        due -- Time the effect is due next
+        effect -- The effect
+
+        """
+        heapq.heappush(self.__heap, (due, next(self.__counter), effect))
+
+    def __end(self, effect):
+        """Removes an effect that ran out.
+
+        Keyword arguments:
+        effect -- The effect
+
+        """
+        effect.active = False
+        entity_id = effect.entity.entity_id
+        effects = self.__by_entity[entity_id]
+        effects.remove(effect)
+        self.__count -= 1
+        if not effects:
+            del self.__by_entity[entity_id]
@@ -0,0 +1,260 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Random event actions and weighted event tables."""
+
+
+import random
+
+
+from .effects import EFFECT_BURNING
+from .effects import EFFECT_REGENERATION
+
+
+class Action:
+    """Base class of all random event actions.
+
+    An action is split into rolling its random parameters and applying
+    them, so a journaled event can be applied again without a random
+    number generator.
+
+    """
+    # Whether the action hits an area, these are centered on a player
+    area = False
+
+    def roll(self, script, rng):
+        """Rolls the random parameters of the action.
+
+        Keyword arguments:
+        script -- The RandomEventScript instance
+        rng -- Random number generator to use
+
+        Return value:
+        A list of the parameters
+
+        """
+        return []
+
+    def apply(self, script, entity, params):
+        """Applies the action.
+
+        Keyword arguments:
+        script -- The RandomEventScript instance
+        entity -- The targeted entity
+        params -- Parameters returned by roll
+
+        Return value:
+        Message describing what happened
+
+        """
+        raise NotImplementedError()
+
+
+class DamageAction(Action):
+    """Damages an entity."""
+    def roll(self, script, rng):
+        return [rng.randint(500, 1000), rng.randint(0, 5000)]
+
+    def apply(self, script, entity, params):
+        entity.damage(params[0], params[1])
+        return 'Damaged %s!' % entity.name
+
+
+class HealAction(Action):
+    """Heals an entity."""
+    def roll(self, script, rng):
+        return [rng.randint(500, 1000)]
+
+    def apply(self, script, entity, params):
+        entity.heal(params[0])
+        return 'Healed %s!' % entity.name
+
+
+class KillAction(Action):
+    """Kills an entity."""
+    def apply(self, script, entity, params):
+        entity.kill()
+        return 'Killed %s!' % entity.name
+
+
+class StunAction(Action):
+    """Stuns an entity."""
+    def roll(self, script, rng):
+        return [rng.randint(1000, 10000)]
+
+    def apply(self, script, entity, params):
+        entity.stun(params[0])
+        return 'Stunned %s!' % entity.name
+
+
+class MeteorAction(Action):
+    """Lets a meteor strike, damaging everything around an entity."""
+    area = True
+
+    def roll(self, script, rng):
+        # the damage per hit entity is derived from this seed
+        return [rng.getrandbits(32)]
+
+    def apply(self, script, entity, params):
+        rng = random.Random(params[0])
+        radius = script.server.config.random_events.meteor_radius
+        hit = script.get_grid().query(entity.pos, radius)
+        for e in hit:
+            if e.hp > 0:
+                e.damage(rng.randint(500, 1000), rng.randint(0, 5000))
+        return 'A meteor struck next to %s!' % entity.name
+
+
+class EffectAction(Action):
+    """Puts a status effect on an entity."""
+    # Kind of the effect and the name of its config entry
+    effect = None
+
+    def roll(self, script, rng):
+        config = getattr(script.server.config.random_events, self.effect)
+        return [config['amount'], config['interval'], config['duration']]
+
+    def apply(self, script, entity, params):
+        script.effects.add(entity, self.effect, params[0], params[1],
+            params[2])
+        return self.message % entity.name
+
+
+class BurnAction(EffectAction):
+    """Sets an entity on fire."""
+    effect = EFFECT_BURNING
+    message = 'Set %s on fire!'
+
+
+class RegenerateAction(EffectAction):
+    """Lets an entity regenerate."""
+    effect = EFFECT_REGENERATION
+    message = '%s started to regenerate!'
+
+
+# All known actions by the name used in the config
+ACTIONS = {
+    'damage' : DamageAction(),
+    'heal' : HealAction(),
+    'kill' : KillAction(),
+    'stun' : StunAction(),
+    'meteor' : MeteorAction(),
+    'burn' : BurnAction(),
+    'regenerate' : RegenerateAction()
+}
+
+
+class AliasTable:
+    """Walker alias table for O(1) weighted sampling."""
+    def __init__(self, items, weights):
+        """Creates a new AliasTable.
+
+        Keyword arguments:
+        items -- Items to sample from
+        weights -- Weights of the items, in the same order
+
+        """
+        count = len(items)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError('An alias table needs a positive weight.')
+        prob = [w * count / total for w in weights]
+        alias = list(range(count))
+        small = [i for i, p in enumerate(prob) if p < 1.0]
+        large = [i for i, p in enumerate(prob) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            alias[s] = l
+            prob[l] = prob[l] + prob[s] - 1.0
+            if prob[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # whatever is left over is only off by rounding errors
+        for i in small + large:
+            prob[i] = 1.0
+        self.__items = list(items)
+        self.__prob = prob
+        self.__alias = alias
+
+    def sample(self, rng=random):
+        """Picks a random item according to the weights.
+
+        Keyword arguments:
+        rng -- Random number generator to use
+
+        Return value:
+        The chosen item
+
+        """
+        i = int(rng.random() * len(self.__items))
+        if rng.random() < self.__prob[i]:
+            return self.__items[i]
+        return self.__items[self.__alias[i]]
+
+
+class EventTable:
+    """Weighted table of events, compiled into an alias table."""
+    def __init__(self, weights):
+        """Creates a new EventTable.
+
+        Keyword arguments:
+        weights -- Dict mapping action names to their weights
+
+        Raises a ValueError if a weight is not a number or no known
+        action has a positive weight. Unknown action names are skipped
+        and listed in unknown.
+
+        """
+        self.weights = dict(weights)
+        self.unknown = []
+        names = []
+        values = []
+        for name, weight in sorted(self.weights.items()):
+            if isinstance(weight, bool) or \
+               not isinstance(weight, (int, float)):
+                raise ValueError('The weight of %s is not a number.' % name)
+            if name not in ACTIONS:
+                self.unknown.append(name)
+            elif weight > 0:
+                names.append(name)
+                values.append(weight)
+        if not names:
+            raise ValueError('No known event has a positive weight.')
+        self.__table = AliasTable(names, values)
+
+    def sample(self, rng=random):
+        """Picks a random action.
+
+        Keyword arguments:
+        rng -- Random number generator to use
+
+        Return value:
+        Tuple of the action name and the Action instance
+
+        """
+        name = self.__table.sample(rng)
+        return name, ACTIONS[name]
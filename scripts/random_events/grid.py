@@ -0,0 +1,92 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Uniform spatial hash grid for radius queries."""
+
+
+class SpatialGrid:
+    """Uniform grid hashing entities by their x/y position."""
+    def __init__(self, cell_size):
+        """Creates a new SpatialGrid.
+
+        Keyword arguments:
+        cell_size -- Edge length of a grid cell in world units
+
+        """
+        self.cell_size = cell_size
+        self.__cells = {}
+
+    def build(self, entities):
+        """Rebuilds the grid from scratch.
+
+        Keyword arguments:
+        entities -- Iterable of the entities to put into the grid
+
+        """
+        size = self.cell_size
+        cells = {}
+        for entity in entities:
+            pos = entity.pos
+            key = (int(pos.x // size), int(pos.y // size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [entity]
+            else:
+                cell.append(entity)
+        self.__cells = cells
+
+    def query(self, pos, radius):
+        """Finds all entities within a radius around a position.
+
+        Keyword arguments:
+        pos -- Center of the query
+        radius -- Radius of the query in world units
+
+        Return value:
+        A list of the entities within the radius
+
+        """
+        size = self.cell_size
+        cells = self.__cells
+        x = pos.x
+        y = pos.y
+        z = pos.z
+        r2 = radius * radius
+        found = []
+        for cx in range(int((x - radius) // size),
+                        int((x + radius) // size) + 1):
+            for cy in range(int((y - radius) // size),
+                            int((y + radius) // size) + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    continue
+                for entity in cell:
+                    p = entity.pos
+                    dx = p.x - x
+                    dy = p.y - y
+                    dz = p.z - z
+                    if dx*dx + dy*dy + dz*dz <= r2:
+                        found.append(entity)
+        return found
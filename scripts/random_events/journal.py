@@ -0,0 +1,126 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Append-only journal of fired random events.
+
+Every line describes one event as tab separated fields: the time in
+seconds since the journal was opened, the stream, the id of the
+targeted entity, the action and the JSON encoded action parameters.
+Lines starting with '#' are comments, a comment is written whenever the
+journal is opened or the seed changes on a config reload to record the
+seed. Every opening starts a new session whose times start at 0 again.
+
+"""
+
+
+import collections
+import json
+import time
+
+
+from ..common.output import AsyncLogWriter
+
+
+# Comments recording the seed, the first one starts a new session
+HEADER_STARTED = '# seed %i, started %s'
+HEADER_RELOADED = '# seed %i, reloaded %s'
+SESSION_MARKER = ', started '
+
+
+JournalEntry = collections.namedtuple('JournalEntry',
+    ['session', 'time', 'stream', 'target_id', 'action', 'params'])
+
+
+class EventJournal:
+    """Writes fired events to a journal file."""
+    def __init__(self, path, seed, now):
+        """Opens the journal for appending.
+
+        Keyword arguments:
+        path -- Path of the journal file
+        seed -- Seed the random events are using
+        now -- Current (monotonic) time in seconds
+
+        """
+        self.path = path
+        self.__start = now
+        self.__writer = AsyncLogWriter(path, console=False)
+        self.__writer.write(HEADER_STARTED % (seed,
+            time.strftime('%Y-%m-%d %H:%M:%S')))
+
+    def reseed(self, seed):
+        """Records a new seed, the times keep counting from the opening.
+
+        Keyword arguments:
+        seed -- Seed the random events are using from now on
+
+        """
+        self.__writer.write(HEADER_RELOADED % (seed,
+            time.strftime('%Y-%m-%d %H:%M:%S')))
+
+    def record(self, now, stream, target_id, action, params):
+        """Records a fired event.
+
+        Keyword arguments:
+        now -- Current (monotonic) time in seconds
+        stream -- Name of the stream the event belongs to
+        target_id -- Id of the targeted entity
+        action -- Name of the action
+        params -- Parameters of the action
+
+        """
+        self.__writer.write('%.3f\t%s\t%i\t%s\t%s' % (now - self.__start,
+            stream, target_id, action,
+            json.dumps(params, separators=(',', ':'))))
+
+    def close(self):
+        """Writes all pending entries and closes the journal."""
+        self.__writer.close()
+
+
+def read_journal(path):
+    """Reads the entries of a journal.
+
+    Keyword arguments:
+    path -- Path of the journal file
+
+    Return value:
+    A generator yielding JournalEntry instances, their session is
+    counted up from 0 whenever the journal was opened again
+
+    """
+    session = -1
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('#'):
+                if SESSION_MARKER in line:
+                    session += 1
+                continue
+            if not line:
+                continue
+            t, stream, target_id, action, params = line.split('\t', 4)
+            yield JournalEntry(max(session, 0), float(t), stream,
+                int(target_id), action, json.loads(params))
@@ -0,0 +1,293 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Entity pools indexed by category and level."""
+
+
+import bisect
+import random
+
+
+from cuwo.constants import HOSTILE_TYPE
+
+
+# Categories entities are indexed by
+CATEGORY_ALL = 'all'
+CATEGORY_PLAYERS = 'players'
+CATEGORY_NPCS = 'npcs'
+CATEGORY_HOSTILE = 'hostile'
+CATEGORY_FRIENDLY = 'friendly'
+CATEGORIES = (CATEGORY_ALL, CATEGORY_PLAYERS, CATEGORY_NPCS,
+              CATEGORY_HOSTILE, CATEGORY_FRIENDLY)
+
+
+def get_categories(entity):
+    """Gets the categories of an entity.
+
+    Keyword arguments:
+    entity -- The entity
+
+    Return value:
+    A tuple of category names
+
+    """
+    if entity.is_player():
+        return (CATEGORY_ALL, CATEGORY_PLAYERS)
+    elif entity.hostile_type == HOSTILE_TYPE:
+        return (CATEGORY_ALL, CATEGORY_NPCS, CATEGORY_HOSTILE)
+    else:
+        return (CATEGORY_ALL, CATEGORY_NPCS, CATEGORY_FRIENDLY)
+
+
+class IndexedPool:
+    """Set of entities supporting O(1) insertion, removal and random
+    choice.
+
+    """
+    def __init__(self):
+        """Creates a new, empty IndexedPool."""
+        self.__entities = []
+        self.__index = {}
+
+    def __len__(self):
+        return len(self.__entities)
+
+    def __getitem__(self, index):
+        return self.__entities[index]
+
+    def add(self, entity):
+        """Adds an entity.
+
+        Keyword arguments:
+        entity -- The entity to add
+
+        """
+        self.__index[entity.entity_id] = len(self.__entities)
+        self.__entities.append(entity)
+
+    def remove(self, entity_id):
+        """Removes an entity by swapping the last entity into its place.
+
+        Keyword arguments:
+        entity_id -- Id of the entity to remove
+
+        """
+        i = self.__index.pop(entity_id)
+        last = self.__entities.pop()
+        if i < len(self.__entities):
+            self.__entities[i] = last
+            self.__index[last.entity_id] = i
+
+    def choice(self, rng):
+        """Picks a random entity.
+
+        Keyword arguments:
+        rng -- Random number generator to use
+
+        Return value:
+        The entity or None if the pool is empty
+
+        """
+        if not self.__entities:
+            return None
+        return self.__entities[rng.randrange(len(self.__entities))]
+
+
+class LevelIndex:
+    """Entities sorted by level, for picking a random entity above a
+    level in O(log n).
+
+    """
+    def __init__(self):
+        """Creates a new, empty LevelIndex."""
+        self.__keys = []
+        self.__entities = {}
+
+    def add(self, entity, level):
+        """Adds an entity.
+
+        Keyword arguments:
+        entity -- The entity to add
+        level -- Level the entity is indexed with
+
+        """
+        bisect.insort(self.__keys, (level, entity.entity_id))
+        self.__entities[entity.entity_id] = entity
+
+    def remove(self, entity_id, level):
+        """Removes an entity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity to remove
+        level -- Level the entity was indexed with
+
+        """
+        i = bisect.bisect_left(self.__keys, (level, entity_id))
+        del self.__keys[i]
+        del self.__entities[entity_id]
+
+    def choice(self, min_level, rng):
+        """Picks a random entity with at least the given level.
+
+        Keyword arguments:
+        min_level -- Minimum level of the entity
+        rng -- Random number generator to use
+
+        Return value:
+        The entity or None if there is no such entity
+
+        """
+        keys = self.__keys
+        i = bisect.bisect_left(keys, (min_level,))
+        if i >= len(keys):
+            return None
+        return self.__entities[keys[rng.randrange(i, len(keys))][1]]
+
+
+class EntityPools:
+    """Incrementally maintained pools of entities for each category."""
+    def __init__(self, entities):
+        """Creates new EntityPools.
+
+        Keyword arguments:
+        entities -- The dict of all entities of the world, used to detect
+                    entities that got removed without notice
+
+        """
+        self.__world_entities = entities
+        self.__indexed = {}
+        # sync first checks the indexed entities from this position on
+        # whether they left the world, then updates the entities of the
+        # sweep
+        self.__cursor = 0
+        self.__sweep = []
+        self.__pools = {c : IndexedPool() for c in CATEGORIES}
+        self.__levels = {c : LevelIndex() for c in CATEGORIES}
+
+    def update(self, entity):
+        """Adds an entity or updates it if its category or level changed.
+
+        Keyword arguments:
+        entity -- The entity
+
+        """
+        key = (get_categories(entity), entity.level)
+        indexed = self.__indexed.get(entity.entity_id)
+        if indexed is not None:
+            if indexed[0] is entity and indexed[1] == key:
+                return
+            self.remove(entity.entity_id)
+        categories, level = key
+        for category in categories:
+            self.__pools[category].add(entity)
+            self.__levels[category].add(entity, level)
+        self.__indexed[entity.entity_id] = (entity, key)
+
+    def remove(self, entity_id):
+        """Removes an entity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        """
+        indexed = self.__indexed.pop(entity_id, None)
+        if indexed is None:
+            return
+        categories, level = indexed[1]
+        for category in categories:
+            self.__pools[category].remove(entity_id)
+            self.__levels[category].remove(entity_id, level)
+
+    def sync(self, budget):
+        """Brings the pools up to date with the world a few entities at a
+        time, so spawned entities and changes of level or hostility are
+        picked up without an event telling about them.
+
+        A sweep first checks the indexed entities whether they left
+        the world, then updates the entities of the world. Each call
+        checks up to budget entities in total.
+
+        Keyword arguments:
+        budget -- Maximum number of entities to check
+
+        Return value:
+        A list of the ids of the entities that were removed
+
+        """
+        removed = []
+        world_entities = self.__world_entities
+        indexed = self.__pools[CATEGORY_ALL]
+        cursor = self.__cursor
+        while budget > 0 and cursor < len(indexed):
+            budget -= 1
+            entity = indexed[cursor]
+            if world_entities.get(entity.entity_id) is entity:
+                cursor += 1
+            else:
+                # the last entity is moved into this position
+                self.remove(entity.entity_id)
+                removed.append(entity.entity_id)
+        self.__cursor = cursor
+        if budget <= 0:
+            return removed
+        sweep = self.__sweep
+        if not sweep:
+            sweep = list(world_entities.values())
+            self.__sweep = sweep
+        for _ in range(min(budget, len(sweep))):
+            entity = sweep.pop()
+            # skip entities that left the world since the sweep started
+            if world_entities.get(entity.entity_id) is entity:
+                self.update(entity)
+        if not sweep:
+            self.__cursor = 0
+        return removed
+
+    def choice(self, category, min_level=None, rng=random):
+        """Picks a random entity of a category.
+
+        Keyword arguments:
+        category -- Name of the category
+        min_level -- Minimum level of the entity or None
+        rng -- Random number generator to use
+
+        Return value:
+        The entity or None if there is no matching entity
+
+        """
+        pool = self.__pools[category]
+        levels = self.__levels[category]
+        world_entities = self.__world_entities
+        while True:
+            if min_level is None:
+                entity = pool.choice(rng)
+            else:
+                entity = levels.choice(min_level, rng)
+            if entity is None:
+                return None
+            if world_entities.get(entity.entity_id) is entity:
+                return entity
+            # the entity left the world without us noticing
+            self.remove(entity.entity_id)
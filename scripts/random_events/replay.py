@@ -0,0 +1,212 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Headless replay of a random events journal.
+
+Applies all events of a journal at full speed to a stand-in world and
+prints how many events of each action ran and how long they took. Has
+to be run from the cuwo directory:
+
+python -m scripts.random_events.replay <journal file>
+
+"""
+
+
+import argparse
+import random
+import time
+
+
+from cuwo.vector import Vector3
+
+
+from .effects import StatusEffectEngine
+from .events import ACTIONS
+from .grid import SpatialGrid
+from .journal import read_journal
+
+
+# Default size of the stand-in world in world units (65536 are one block)
+DEFAULT_WORLD_SIZE = 2000 * 65536
+DEFAULT_RADIUS = 20 * 65536
+
+
+class StandInEntity:
+    """Entity of the stand-in world, only keeping track of its hp."""
+    def __init__(self, entity_id, pos):
+        """Creates a new StandInEntity.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+        pos -- Position of the entity
+
+        """
+        self.entity_id = entity_id
+        self.name = 'Entity %i' % entity_id
+        self.pos = pos
+        self.hp = 1000.0
+
+    def damage(self, damage=0, stun_duration=0):
+        self.hp = max(0.0, self.hp - damage)
+
+    def heal(self, amount):
+        self.hp = self.hp + amount
+
+    def kill(self):
+        self.hp = 0.0
+
+    def stun(self, duration):
+        pass
+
+
+class StandInWorld:
+    """World creating a stand-in entity for every id asked for."""
+    def __init__(self, size, seed=0):
+        """Creates a new StandInWorld.
+
+        Keyword arguments:
+        size -- Edge length of the world in world units
+        seed -- Seed used to place the entities
+
+        """
+        self.size = size
+        self.seed = seed
+        self.entities = {}
+
+    def get(self, entity_id):
+        """Gets an entity, creating it at a random position if needed.
+
+        Keyword arguments:
+        entity_id -- Id of the entity
+
+        Return value:
+        The StandInEntity instance
+
+        """
+        entity = self.entities.get(entity_id)
+        if entity is None:
+            rng = random.Random(self.seed ^ entity_id)
+            pos = Vector3(rng.randrange(self.size), rng.randrange(self.size),
+                0)
+            entity = StandInEntity(entity_id, pos)
+            self.entities[entity_id] = entity
+        return entity
+
+
+class StandInScript:
+    """Provides what the actions expect from a RandomEventScript."""
+    def __init__(self, world, meteor_radius, cell_size):
+        """Creates a new StandInScript.
+
+        Keyword arguments:
+        world -- The StandInWorld
+        meteor_radius -- Radius of meteor strikes
+        cell_size -- Cell size of the spatial grid
+
+        """
+        config = argparse.Namespace(meteor_radius=meteor_radius)
+        self.server = argparse.Namespace(world=world,
+            config=argparse.Namespace(random_events=config))
+        self.grid = SpatialGrid(cell_size)
+        self.effects = StatusEffectEngine(world.entities, 0.0)
+
+    def get_grid(self):
+        """Returns the spatial grid, rebuilt for every event."""
+        self.grid.build(self.server.world.entities.values())
+        return self.grid
+
+
+def replay(path, script):
+    """Replays a journal.
+
+    Keyword arguments:
+    path -- Path of the journal file
+    script -- The StandInScript the events are applied with
+
+    Return value:
+    Dict mapping action names to [count, seconds] lists, the time spent
+    updating status effects is listed as '(effect updates)'. Status
+    effects are dropped whenever a new session of the journal starts,
+    like they were when the server restarted
+
+    """
+    world = script.server.world
+    stats = {}
+    timer = time.perf_counter
+    effect_updates = 0
+    effect_time = 0.0
+    session = 0
+    for entry in read_journal(path):
+        if entry.session != session:
+            session = entry.session
+            script.effects = StatusEffectEngine(world.entities, 0.0)
+        start = timer()
+        script.effects.update(entry.time)
+        effect_time += timer() - start
+        effect_updates += 1
+        entity = world.get(entry.target_id)
+        action = ACTIONS[entry.action]
+        start = timer()
+        action.apply(script, entity, entry.params)
+        elapsed = timer() - start
+        s = stats.get(entry.action)
+        if s is None:
+            stats[entry.action] = [1, elapsed]
+        else:
+            s[0] += 1
+            s[1] += elapsed
+    if effect_updates > 0:
+        stats['(effect updates)'] = [effect_updates, effect_time]
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays a random ' +
+        'events journal against a stand-in world.')
+    parser.add_argument('journal', help='Path of the journal file')
+    parser.add_argument('--entities', type=int, default=0,
+        help='Number of additional entities placed in the world')
+    parser.add_argument('--world-size', type=int,
+        default=DEFAULT_WORLD_SIZE, help='Edge length of the world')
+    parser.add_argument('--radius', type=int, default=DEFAULT_RADIUS,
+        help='Radius of meteor strikes')
+    args = parser.parse_args()
+
+    world = StandInWorld(args.world_size)
+    for i in range(args.entities):
+        world.get(-1 - i)
+    script = StandInScript(world, args.radius, args.radius)
+
+    start = time.perf_counter()
+    stats = replay(args.journal, script)
+    total = time.perf_counter() - start
+    count = sum(s[0] for name, s in stats.items() if name in ACTIONS)
+    for name, (n, seconds) in sorted(stats.items()):
+        print('%-10s %8i events %10.6f s' % (name, n, seconds))
+    print('%i events replayed in %.3f s' % (count, total))
+
+
+if __name__ == '__main__':
+    main()
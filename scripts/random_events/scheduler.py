@@ -0,0 +1,162 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Bjoern Lange
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without restriction,
+# including without limitation the rights to use, copy, modify, merge,
+# publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so,
+# subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Scheduling of random event streams."""
+
+
+import random
+import zlib
+
+
+from ..common.timerwheel import TimerWheel
+
+
+class EventStream:
+    """A named stream of random events."""
+    def __init__(self, name, period, jitter=0.0, priority='normal',
+        seed=None, target=None):
+        """Creates a new EventStream.
+
+        Keyword arguments:
+        name -- Name of the stream
+        period -- Average time between two events in seconds
+        jitter -- Maximum random deviation from the period in seconds
+        priority -- Priority of the events, decides what happens to them
+                    while the server is overloaded
+        seed -- Seed of the server wide random events, the random number
+                generator of the stream is derived from it
+        target -- Dict restricting the targets of the events by
+                  'category' and 'min_level', None for no restriction
+
+        """
+        self.name = name
+        self.period = float(period)
+        self.jitter = float(jitter)
+        self.priority = priority
+        self.target = target or {}
+        self.active = True
+        if seed is None:
+            self.rng = random.Random()
+        else:
+            self.rng = random.Random(seed ^ zlib.crc32(name.encode()))
+
+    def next_delay(self):
+        """Calculates the delay until the next event of this stream.
+
+        Return value:
+        The delay in seconds
+
+        """
+        jitter = self.jitter
+        if jitter > 0:
+            return max(0.0, self.period + self.rng.uniform(-jitter,
+                jitter))
+        return self.period
+
+
+class DeferredEvent:
+    """An event of a stream that got postponed."""
+    def __init__(self, stream, defers):
+        """Creates a new DeferredEvent.
+
+        Keyword arguments:
+        stream -- The stream the event belongs to
+        defers -- How often the event has been deferred so far
+
+        """
+        self.stream = stream
+        self.defers = defers
+
+
+class EventScheduler:
+    """Schedules the events of many event streams."""
+    def __init__(self, resolution, now):
+        """Creates a new EventScheduler.
+
+        Keyword arguments:
+        resolution -- Resolution of the scheduler in seconds
+        now -- Current (monotonic) time in seconds
+
+        """
+        self.__wheel = TimerWheel(resolution, now)
+        self.streams = {}
+
+    def set_streams(self, definitions, seed=None):
+        """Replaces all event streams.
+
+        Keyword arguments:
+        definitions -- Dict mapping stream names to dicts holding the
+                       'period' and optionally the 'jitter',
+                       'priority' and 'target' of a stream
+        seed -- Seed the random number generators of the streams are
+                derived from, None for unseeded generators
+
+        """
+        for stream in self.streams.values():
+            stream.active = False
+        self.streams = {}
+        for name, definition in definitions.items():
+            stream = EventStream(name, definition['period'],
+                definition.get('jitter', 0.0),
+                definition.get('priority', 'normal'), seed,
+                definition.get('target'))
+            self.streams[name] = stream
+            self.__wheel.schedule(stream.next_delay(), stream)
+
+    def defer(self, stream, delay, defers):
+        """Postpones a single event of a stream.
+
+        Keyword arguments:
+        stream -- The stream the event belongs to
+        delay -- Delay in seconds
+        defers -- How often the event has been deferred including this
+                  time
+
+        """
+        self.__wheel.schedule(delay, DeferredEvent(stream, defers))
+
+    def update(self, now):
+        """Collects all events that are due and reschedules their
+        streams.
+
+        Keyword arguments:
+        now -- Current (monotonic) time in seconds
+
+        Return value:
+        A list of (stream, defers) tuples for the events that fire now,
+        defers being how often the event has been deferred
+
+        """
+        wheel = self.__wheel
+        due = []
+        for item in wheel.advance(now):
+            if isinstance(item, DeferredEvent):
+                if item.stream.active:
+                    due.append((item.stream, item.defers))
+            elif item.active:
+                # streams removed by a config reload are dropped lazily
+                due.append((item, 0))
+                wheel.schedule(item.next_delay(), item)
+        return due